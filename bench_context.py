@@ -0,0 +1,79 @@
+"""
+Benchmark of extract/context.context_around_keyword against the old version that re-tokenised the
+page prefix for every match and returned one window per match. Uses the cleaned text of the pages
+stored in the HTTP cache (plus any .html files given), reports how many words each version would send
+to the LLM and checks that every old window is still covered by one of the merged passages.
+
+    python bench_context.py                         # cached pages, keyword "cloud"
+    python bench_context.py -k AWS saved/*.html     # another keyword, plus local files
+"""
+import re
+import time
+import argparse
+
+from extract.context import context_around_keyword
+from extract.document import Document
+from test_parser_parity import load_pages
+
+
+def legacy_context_around_keyword(text: str, keyword: str, context_words: int = 250, max_matches: int = 5) -> list:
+    """The quadratic implementation normal_3 and normal_4 used to carry."""
+    words = re.findall(r'\b\w+\b', text)
+    pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+    matches = []
+    for match in pattern.finditer(text):
+        if len(matches) >= max_matches:
+            break
+        word_idx = len(re.findall(r'\b\w+\b', text[:match.start()]))
+        start = max(0, word_idx - context_words)
+        end = min(len(words), word_idx + context_words)
+        matches.append({"keyword": keyword, "context": " ".join(words[start:end])})
+    return matches
+
+
+def bench(label: str, func, texts, keyword: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text, keyword)
+    per_page = (time.perf_counter() - start) / (rounds * len(texts)) * 1000
+    print(f"|   {label:<24} {per_page:8.2f} ms/page")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="extra .html files to include")
+    parser.add_argument("-k", "--keyword", default="cloud")
+    parser.add_argument("-n", "--rounds", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="also time long pages: this many keyword-free copies of each text before the text itself")
+    args = parser.parse_args()
+
+    texts = [Document(html).clean_text() for _, html in load_pages(args.files)]
+    if not texts:
+        print("No stored pages found. Run a batch first (it fills the HTTP cache) or pass .html files.")
+        return
+    covered, old_words, new_words = 0, 0, 0
+    for text in texts:
+        old = [match["context"] for match in legacy_context_around_keyword(text, args.keyword)]
+        new = [match["context"] for match in context_around_keyword(text, args.keyword, word_budget=10**9)]
+        covered += all(any(window in passage for passage in new) for window in old)
+        old_words += sum(len(window.split()) for window in old)
+        new_words += sum(len(match["context"].split()) for match in context_around_keyword(text, args.keyword))
+    print(f"| {len(texts)} pages, keyword {args.keyword!r}: old windows covered on {covered}/{len(texts)} pages")
+    print(f"|   words sent: {old_words} -> {new_words} ({1 - new_words / max(old_words, 1):.0%} fewer)")
+
+    # Long listing pages where the keyword only shows up far down, the case the prefix re-scan was slow on
+    keyword_pattern = re.compile(rf"\b{re.escape(args.keyword)}\b", re.IGNORECASE)
+    long_texts = [" ".join([keyword_pattern.sub("", text)] * args.repeat + [text]) for text in texts]
+    for label, sample in (("pages", texts), (f"pages x{args.repeat}", long_texts)):
+        size_mb = sum(len(text) for text in sample) / 1e6
+        print(f"| {label}: {size_mb:.1f} MB of text, {args.rounds} rounds")
+        baseline = bench("legacy (prefix findall)", legacy_context_around_keyword, sample, args.keyword, args.rounds)
+        per_page = bench("word-offset index", context_around_keyword, sample, args.keyword, args.rounds)
+        print(f"|   {'':<24} {baseline / per_page:8.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark of the sentence embedding backends in extract/embeddings.py: sentences/sec of the PyTorch
+SentenceTransformer against the int8-quantized ONNX graph, for each thread count given. Uses the
+sentences of the pages stored in the HTTP cache (plus any .html files given; a built-in sample otherwise).
+
+    python bench_embeddings.py                       # default threads, batch size 64
+    python bench_embeddings.py --threads 1 2 4 -b 128
+"""
+import time
+import argparse
+
+from extract.embeddings import EMBEDDING_MODEL, ONNX_AVAILABLE, load_model
+from test_embedding_parity import load_sentences
+
+
+def bench(backend: str, threads: int, sentences, batch_size: int, rounds: int) -> float:
+    model = load_model(EMBEDDING_MODEL, backend, threads, require_parity=False)
+    model.encode(sentences[:batch_size], batch_size=batch_size)  # warm up: graph optimisation, allocations
+    start = time.perf_counter()
+    for _ in range(rounds):
+        model.encode(sentences, batch_size=batch_size)
+    per_second = rounds * len(sentences) / (time.perf_counter() - start)
+    print(f"|   {backend:<6} threads={threads or 'default':<8} {per_second:10.1f} sentences/s "
+          f"{1000 / per_second:8.2f} ms/sentence")
+    return per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="extra .html files to include")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="thread counts to try, 0 = default")
+    parser.add_argument("-b", "--batch-size", type=int, default=64)
+    parser.add_argument("-n", "--rounds", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=2000, help="sentences to encode per round at most")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.files, args.limit)
+    backends = ["torch", "onnx"] if ONNX_AVAILABLE else ["torch"]
+    if not ONNX_AVAILABLE:
+        print("onnxruntime/optimum are not installed (pip install 'sentence-transformers[onnx]'); timing torch only.")
+    print(f"| {EMBEDDING_MODEL}: {len(sentences)} sentences, batch size {args.batch_size}, {args.rounds} rounds")
+    for threads in args.threads:
+        results = {backend: bench(backend, threads, sentences, args.batch_size, args.rounds) for backend in backends}
+        if "onnx" in results:
+            print(f"|   {'':<24} {results['onnx'] / results['torch']:8.1f}x onnx vs torch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of extract/matcher.KeywordMatcher (token Aho-Corasick, one pass per page) against the regexes it
+replaced: one \\bkeyword\\b search per TechnologyScanner keyword, and the same keywords as precompiled
+whole-word patterns. Times both the scanner's input (lower-cased raw HTML) and the isolators' input
+(cleaned page text, lower-cased the same way) from the pages stored in the HTTP cache (plus any .html
+files given), and checks that every approach finds the same keywords on every page.
+
+    python bench_matcher.py                     # cached pages
+    python bench_matcher.py -n 5 saved/*.html   # more rounds, plus local files
+"""
+import re
+import time
+import argparse
+
+from extract.document import Document
+from extract.matcher import KeywordMatcher
+from test_case import KEYWORDS_DICT
+from test_parser_parity import load_pages
+
+
+def legacy_found(keywords, content: str) -> set:
+    """TechnologyScanner.scan_page_for_keywords before the matcher: one re.search per keyword."""
+    return {keyword for keyword in keywords if re.search(r'\b' + re.escape(keyword) + r'\b', content)}
+
+
+def compiled_found(patterns, content: str) -> set:
+    """The same searches with every pattern compiled once, the way keyword_pattern() caches them."""
+    return {keyword for keyword, pattern in patterns if pattern.search(content)}
+
+
+def bench(label: str, func, texts, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text)
+    per_page = (time.perf_counter() - start) / (rounds * len(texts)) * 1000
+    print(f"|   {label:<28} {per_page:8.3f} ms/page")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="extra .html files to include")
+    parser.add_argument("-n", "--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = [html for _, html in load_pages(args.files)]
+    if not pages:
+        print("No stored pages found. Run a batch first (it fills the HTTP cache) or pass .html files.")
+        return
+    keywords = list(dict.fromkeys(keyword.lower() for aliases in KEYWORDS_DICT.values() for keyword in aliases))
+    patterns = [(keyword, re.compile(r"(?<!\w)" + re.escape(keyword) + r"(?!\w)")) for keyword in keywords]
+    matcher = KeywordMatcher(keywords)
+
+    samples = (("raw HTML (scanner)", [html.lower() for html in pages]),
+               ("clean text (isolators)", [Document(html).clean_text().lower() for html in pages]))
+    for label, texts in samples:
+        mismatched = []
+        for text in texts:
+            expected = legacy_found(keywords, text)
+            for name, found in (("compiled", compiled_found(patterns, text)), ("matcher", matcher.found(text))):
+                if found != expected:
+                    mismatched.append((name, sorted(expected ^ found)))
+        size_mb = sum(len(text) for text in texts) / 1e6
+        print(f"| {label}: {len(texts)} pages, {size_mb:.1f} MB, {len(keywords)} keywords, {args.rounds} rounds")
+        print(f"|   hit parity with \\b regexes: "
+              f"{'all pages identical' if not mismatched else f'{len(mismatched)} differing page(s)'}")
+        for name, keys in mismatched[:5]:
+            print(f"|     {name}: differs on {keys}")
+        baseline = bench("re.search per keyword", lambda text: legacy_found(keywords, text), texts, args.rounds)
+        compiled = bench("precompiled per keyword", lambda text: compiled_found(patterns, text), texts, args.rounds)
+        automaton = bench("KeywordMatcher.found", matcher.found, texts, args.rounds)
+        print(f"|   {'':<28} {baseline / automaton:8.2f}x vs re.search, {compiled / automaton:.2f}x vs precompiled")
+
+
+if __name__ == "__main__":
+    main()
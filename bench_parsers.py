@@ -0,0 +1,78 @@
+"""
+Benchmark of the HTML parser backends in extract/document.py against the old BeautifulSoup code.
+Each round does what one row costs: parse once, clean text, main content, date hints, meta/JSON-LD and anchors.
+
+    python bench_parsers.py                      # pages stored in the HTTP cache
+    python bench_parsers.py saved/*.html -n 5    # local files, 5 rounds
+"""
+import re
+import sys
+import time
+import argparse
+import warnings
+
+from bs4 import BeautifulSoup
+from extract.document import Document, BACKENDS, NON_CONTENT_TAGS
+from extract.page import DATE_HINT_SELECTORS
+from test_parser_parity import load_pages
+
+warnings.filterwarnings("ignore")
+
+
+def run_document(html: str, backend: str):
+    document = Document(html, backend=backend)
+    document.clean_text()
+    document.content_text()
+    document.text(separator=" ", strip=True)
+    for selector in DATE_HINT_SELECTORS:
+        document.texts(selector)
+    return document.meta, document.json_ld, document.anchors
+
+
+def run_legacy(html: str, parser: str):
+    """One soup per extractor, as clean_html, date_me_3 and social_links used to do."""
+    soup = BeautifulSoup(html, parser)
+    for tag in soup(list(NON_CONTENT_TAGS)):
+        tag.decompose()
+    re.sub(r"\s+", " ", soup.get_text(separator=" ")).strip()
+    soup = BeautifulSoup(html, parser)
+    soup.get_text(separator=" ", strip=True)
+    for selector in DATE_HINT_SELECTORS:
+        [tag.get_text() for tag in soup.select(selector)]
+    soup.find_all("meta")
+    soup.find_all("script", type="application/ld+json")
+    return [a.get("href") for a in BeautifulSoup(html, parser).find_all("a", href=True)]
+
+
+def bench(label: str, func, pages, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, html in pages:
+            func(html)
+    per_page = (time.perf_counter() - start) / (rounds * len(pages)) * 1000
+    print(f"|   {label:<24} {per_page:8.2f} ms/page")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="extra .html files to include")
+    parser.add_argument("-n", "--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.files)
+    if not pages:
+        print("No stored pages found. Run a batch first (it fills the HTTP cache) or pass .html files.")
+        return
+    size_mb = sum(len(html) for _, html in pages) / 1e6
+    print(f"| {len(pages)} pages, {size_mb:.1f} MB of HTML, {args.rounds} rounds")
+
+    baseline = bench("legacy bs4 (lxml)", lambda html: run_legacy(html, "lxml"), pages, args.rounds)
+    bench("legacy bs4 (html.parser)", lambda html: run_legacy(html, "html.parser"), pages, args.rounds)
+    for backend in BACKENDS:
+        per_page = bench(f"Document[{backend}]", lambda html, b=backend: run_document(html, b), pages, args.rounds)
+        print(f"|   {'':<24} {baseline / per_page:8.1f}x vs legacy bs4 (lxml)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import re
+from typing import Iterable, List, Optional, Tuple
+
+# --- Configuration Constants ---
+# Readability-style scoring: every paragraph-like block with enough text credits its parent fully and its
+# grandparent by half; a candidate's score is then scaled down by its link density and the best one wins.
+START, TEXT, END = "start", "text", "end"  # events a Document backend yields while walking the page
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "html", "li", "main", "nav", "ol", "p", "pre", "section", "summary", "table", "tbody", "td",
+    "tfoot", "th", "thead", "tr", "ul",
+}
+PARAGRAPH_TAGS = {"p", "pre", "td", "blockquote", "li", "dd"}
+TAG_WEIGHTS = {
+    "article": 10, "main": 10, "div": 5, "section": 3, "pre": 3, "td": 3, "blockquote": 3,
+    "address": -3, "ol": -3, "ul": -3, "dl": -3, "dd": -3, "dt": -3, "li": -3, "form": -3,
+    "h1": -5, "h2": -5, "h3": -5, "h4": -5, "h5": -5, "h6": -5, "th": -5,
+}
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|page|post|text|blog|story|description|detail|job", re.I)
+NEGATIVE_HINTS = re.compile(r"comment|footer|footnote|sidebar|widget|nav|menu|breadcrumb|share|social|related|"
+                            r"promo|advert|sponsor|banner|cookie|consent|popup|modal|newsletter|subscribe", re.I)
+HINT_WEIGHT = 25
+MIN_PARAGRAPH_CHARS = 25   # shorter blocks (menu items, buttons, captions) earn nothing
+MIN_CONTENT_CHARS = 250    # below this the "main content" is not trusted and the whole page is used
+SIBLING_SHARE = 0.2        # siblings scoring at least this share of the winner are kept with it
+
+
+class _Node:
+    """One element of the outline: its text and child elements in document order, plus running totals."""
+    __slots__ = ("tag", "hint", "parent", "parts", "chars", "link_chars", "commas", "score", "has_blocks")
+
+    def __init__(self, tag: str, hint: str, parent: Optional["_Node"]):
+        self.tag, self.hint, self.parent = tag, hint, parent
+        self.parts: list = []
+        self.chars = self.link_chars = self.commas = 0
+        self.score: Optional[float] = None  # None until a paragraph credits this node
+        self.has_blocks = False
+
+    @property
+    def link_density(self) -> float:
+        return self.link_chars / self.chars if self.chars else 1.0
+
+    @property
+    def final_score(self) -> float:
+        return (self.score or 0.0) * (1 - self.link_density)
+
+    def credit(self, amount: float, candidates: list):
+        if self.score is None:
+            self.score = TAG_WEIGHTS.get(self.tag, 0)
+            if POSITIVE_HINTS.search(self.hint):
+                self.score += HINT_WEIGHT
+            if NEGATIVE_HINTS.search(self.hint):
+                self.score -= HINT_WEIGHT
+            candidates.append(self)
+        self.score += amount
+
+
+def _close(node: _Node, candidates: list):
+    """Totals a finished element (its children are already done) and lets a paragraph credit its ancestors."""
+    for part in node.parts:
+        if isinstance(part, str):
+            node.chars += len(part.strip())
+            node.commas += part.count(",")
+        else:
+            node.chars += part.chars
+            node.link_chars += part.link_chars
+            node.commas += part.commas
+            node.has_blocks |= part.tag in BLOCK_TAGS
+    if node.tag == "a":
+        node.link_chars = node.chars
+    is_paragraph = node.tag in PARAGRAPH_TAGS or (node.tag == "div" and not node.has_blocks)
+    if is_paragraph and node.chars >= MIN_PARAGRAPH_CHARS and node.parent is not None:
+        amount = 1 + node.commas + min(node.chars // 100, 3)
+        node.parent.credit(amount, candidates)
+        if node.parent.parent is not None:
+            node.parent.parent.credit(amount / 2, candidates)
+
+
+def outline(events: Iterable[tuple]) -> Tuple[Optional[_Node], List[_Node]]:
+    """Builds the outline from a backend's event stream in one pass; returns (root, scored candidates)."""
+    root, stack, candidates = None, [], []
+    for event in events:
+        kind = event[0]
+        if kind == TEXT:
+            if stack:
+                stack[-1].parts.append(event[1])
+        elif kind == START:
+            node = _Node(event[1], event[2], stack[-1] if stack else None)
+            if stack:
+                stack[-1].parts.append(node)
+            else:
+                root = root or node
+            stack.append(node)
+        elif stack:
+            _close(stack.pop(), candidates)
+    while stack:
+        _close(stack.pop(), candidates)
+    return root, candidates
+
+
+def main_nodes(root: Optional[_Node], candidates: List[_Node]) -> List[_Node]:
+    """The best-scoring candidate and its strong siblings; [root] when no candidate is convincing."""
+    if root is None:
+        return []
+    best = max(candidates, key=lambda node: node.final_score, default=None)
+    if best is None or best.chars < MIN_CONTENT_CHARS:
+        return [root]
+    if best.parent is None:
+        return [best]
+    threshold = max(10.0, best.final_score * SIBLING_SHARE)
+    return [
+        sibling for sibling in best.parent.parts
+        if sibling is best or (
+            not isinstance(sibling, str) and (
+                (sibling.score is not None and sibling.final_score >= threshold)
+                or (sibling.tag == "p" and sibling.chars >= 80 and sibling.link_density < 0.25)
+            )
+        )
+    ]
+
+
+def blocks(nodes: List[_Node]) -> List[str]:
+    """Text of `nodes` split at block-level elements, whitespace collapsed, empty blocks left out."""
+    result, buffer = [], []
+
+    def flush():
+        text = " ".join(" ".join(buffer).split())  # strings joined with a space, as in clean_text()
+        if text:
+            result.append(text)
+        buffer.clear()
+
+    for node in nodes:
+        stack = [(node, iter(node.parts))]
+        flush()
+        while stack:
+            current, parts = stack[-1]
+            for part in parts:
+                if isinstance(part, str):
+                    buffer.append(part)
+                    continue
+                if part.tag in BLOCK_TAGS:
+                    flush()
+                stack.append((part, iter(part.parts)))
+                break
+            else:
+                stack.pop()
+                if current.tag in BLOCK_TAGS:
+                    flush()
+    flush()
+    return result
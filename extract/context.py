@@ -0,0 +1,86 @@
+import os
+import re
+from bisect import bisect_left
+from itertools import islice
+from typing import List, Tuple
+
+from extract.keywords import keyword_pattern
+
+# --- Configuration Constants ---
+WORD_PATTERN = re.compile(r'\b\w+\b')
+CONTEXT_WORD_BUDGET = int(os.environ.get("CONTEXT_WORD_BUDGET", "1500"))  # words across all passages of one page
+
+
+def word_starts(text: str, end: int = None) -> List[int]:
+    """Character offsets where each word of `text` (up to `end`) starts, in ascending order."""
+    return list(map(re.Match.start, WORD_PATTERN.finditer(text, 0, len(text) if end is None else end)))
+
+
+def _merge(windows: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Merges (first_word, end_word, anchor_word) windows that overlap or touch; the anchor is the first match."""
+    merged = []
+    for first, end, anchor in windows:
+        if merged and first <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end), merged[-1][2])
+        else:
+            merged.append((first, end, anchor))
+    return merged
+
+
+def _fit_budget(windows: List[Tuple[int, int, int]], budget: int) -> List[Tuple[int, int, int]]:
+    """
+    Shares `budget` words between the windows: each gets an equal share of what is left (unused words
+    roll over to the next) and a window that has to shrink is re-centred on its first match.
+    """
+    fitted = []
+    for position, (first, end, anchor) in enumerate(windows):
+        share = budget // (len(windows) - position)
+        if share <= 0:
+            break
+        if end - first > share:
+            first = min(max(first, anchor - share // 2), end - share)
+            end = first + share
+        fitted.append((first, end, anchor))
+        budget -= end - first
+    return fitted
+
+
+def keyword_spans(text: str, keyword: str, context_words: int = 250, max_matches: int = 5,
+                  word_budget: int = CONTEXT_WORD_BUDGET) -> List[Tuple[int, int]]:
+    """
+    Character spans of the passages around the first `max_matches` occurrences of `keyword` (or its aliases).
+    Each match takes `context_words` words either side; windows that overlap or touch are merged into
+    one passage, and all passages together hold at most `word_budget` words.
+    """
+    positions = [match.start() for _, match in zip(range(max_matches), keyword_pattern(keyword).finditer(text))]
+    if not positions:
+        return []
+
+    # Words are only indexed up to `context_words` past the last match; nothing later can be in a window
+    starts = word_starts(text, positions[-1])
+    starts.extend(map(re.Match.start, islice(WORD_PATTERN.finditer(text, positions[-1]), context_words)))
+    windows = []
+    for idx in positions:
+        word_idx = bisect_left(starts, idx)  # a match never starts inside a word
+        windows.append((max(0, word_idx - context_words), min(len(starts), word_idx + context_words), word_idx))
+
+    spans = []
+    for first, end, _ in _fit_budget(_merge(windows), word_budget):
+        if first < end:
+            spans.append((starts[first], WORD_PATTERN.match(text, starts[end - 1]).end()))
+    return spans
+
+
+def context_around_keyword(text: str, keyword: str, context_words: int = 250, max_matches: int = 5,
+                           word_budget: int = CONTEXT_WORD_BUDGET) -> list:
+    """
+    Finds up to `max_matches` occurrences of a keyword and returns the surrounding context, one entry per
+    distinct passage: matches close enough for their windows to overlap share a single passage.
+    """
+    return [
+        {
+            "keyword": keyword,
+            "context": " ".join(WORD_PATTERN.findall(text, start, end))
+        }
+        for start, end in keyword_spans(text, keyword, context_words, max_matches, word_budget)
+    ]
@@ -1,17 +1,22 @@
 import requests
 import json
 import re
-from bs4 import BeautifulSoup
 from dateutil.parser import parse
 from datefinder import find_dates
 from datetime import datetime, date
 from typing import Optional, Tuple
 from extract.pdf_3_adv import *
+from extract.page import Page, fetch_page, DATE_HINT_SELECTORS
+from extract.document import Document
+from extract.pdf_range import read_pdf_info
 
 # --- Configuration Constants ---
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 REQUEST_TIMEOUT = 45
 MAX_FUTURE_YEAR_OFFSET = 0
+JSON_LD_DATE_KEYS = ['dateModified','datePublished', 'publishedDate', 'dateCreated', 'uploadDate']
+# Meta tag name/property values holding a date, in order of preference
+META_DATE_KEYS = ['dateModified', 'article:modified_time', 'datePublished', 'article:published_time', 'pubdate', 'date']
 
 
 # --- Private Helper Functions for Each Step ---
@@ -42,56 +47,52 @@ def _find_date_in_url(url: str) -> Optional[date]:
     return None
 
 
-def _find_date_in_metadata(soup: BeautifulSoup) -> Tuple[Optional[date], Optional[str]]:
+def _find_date_in_metadata(document: Document) -> Tuple[Optional[date], Optional[str]]:
     """Step 2: Search structured metadata (JSON-LD, meta tags). This is highly reliable."""
+    return _find_date_in_signals(document.json_ld, document.meta)
+
+
+def _find_date_in_signals(json_ld: list, meta: dict) -> Tuple[Optional[date], Optional[str]]:
+    """Step 2 on already collected JSON-LD blocks and {name/property: content} meta tags."""
     # 2a: JSON-LD (often used by news sites and blogs)
-    json_ld_keys = ['dateModified','datePublished', 'publishedDate', 'dateCreated', 'uploadDate']
-    for script in soup.find_all('script', type='application/ld+json'):
+    for block in json_ld:
         try:
-            data = json.loads(script.string)
-            for key in json_ld_keys:
+            data = json.loads(block)
+            for key in JSON_LD_DATE_KEYS:
                 if dt := _parse_and_get_date(data.get(key)):
                     return dt, "json-ld"
-        except (json.JSONDecodeError, TypeError):
+        except (json.JSONDecodeError, TypeError, AttributeError):
             continue
 
     # 2b: Meta Tags
-    # ------------------------------------------------------------------------
-    # last modified this list
-
-    meta_selectors = {
-        "meta[name='dateModified']": "meta_tag",
-        "meta[property='article:modified_time']": "meta_tag",
-        "meta[name='datePublished']": "meta_tag",
-        "meta[property='article:published_time']": "meta_tag",
-        "meta[name='pubdate']": "meta_tag",
-        "meta[name='date']": "meta_tag",
-    }
-    for selector, method in meta_selectors.items():
-        if tag := soup.select_one(selector):
-            if dt := _parse_and_get_date(tag.get('content')):
-                return dt, method
+    for key in META_DATE_KEYS:
+        if dt := _parse_and_get_date(meta.get(key)):
+            return dt, "meta_tag"
     return None, None
 
 
-def _find_date_in_visible_text(soup: BeautifulSoup, text: str) -> Optional[date]:
+def _find_date_in_visible_text(document: Document, text: str) -> Optional[date]:
     """
     Step 3 (Improved): Searches for dates first in specific, high-probability HTML tags,
     and then falls back to a general search on the page's text.
     """
+    hints = (
+        tag_text or datetime_attr or ''
+        for selector in DATE_HINT_SELECTORS
+        for tag_text, datetime_attr in document.items(selector, 'datetime')
+    )
+    return _find_date_in_hints(hints, text)
+
+
+def _find_date_in_hints(hints, text: str) -> Optional[date]:
+    """Step 3 on the texts of date-like elements (in DATE_HINT_SELECTORS order) and the page text."""
     # 3a: High-precision search in common date-related tags
-    date_selectors = [
-        'time[datetime]', '[class*="date"]', '[class*="publish"]',
-        '[class*="timestamp"]', '[id*="date"]', '[id*="publish"]'
-    ]
-    for selector in date_selectors:
-        for tag in soup.select(selector):
-            tag_text = tag.get_text() or tag.get('datetime', '')
-            found_dates = list(find_dates(tag_text))
-            if found_dates:
-                dt = found_dates[0]
-                if 2001 < dt.year <= datetime.now().year + MAX_FUTURE_YEAR_OFFSET:
-                    return dt.date()
+    for tag_text in hints:
+        found_dates = list(find_dates(tag_text))
+        if found_dates:
+            dt = found_dates[0]
+            if 2001 < dt.year <= datetime.now().year + MAX_FUTURE_YEAR_OFFSET:
+                return dt.date()
 
     # 3b: Fallback to a broader search on the first 10,000 characters
     found_dates = list(find_dates(text[:10000]))
@@ -118,14 +119,14 @@ def _find_date_in_copyright(text: str) -> Optional[date]:
 
 # --- Main Public Function ---
 
-def find_best_date_on_page(url: str) -> Tuple[Optional[str], str]:
+def find_best_date_on_page(url: str, page: Page = None) -> Tuple[Optional[str], str]:
     """
     Finds the best possible date on a webpage using a prioritized 4-step strategy.
+    Pass an already fetched `page` to reuse its HTML instead of downloading the URL again.
     """
     try:
-        response = requests.get(url, headers={'User-Agent': USER_AGENT}, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'lxml') # Using lxml is generally faster
+        if page is None:
+            page = fetch_page(url, headers={'User-Agent': USER_AGENT}, timeout=REQUEST_TIMEOUT)
     except requests.RequestException:
         # Let the main script handle the error by re-raising it
         raise
@@ -136,13 +137,27 @@ def find_best_date_on_page(url: str) -> Tuple[Optional[str], str]:
     if dt := _find_date_in_url(url):
         return dt.strftime("%m/%Y"), "url_path"
 
+    signals = page.date_signals
+    if page.html is None and signals:
+        # Extracted inside the browser: no HTML to parse, the signals were collected there
+        dt_meta = _find_date_in_signals(signals.get("json_ld", []), signals.get("meta", {}))
+        text_to_search = re.sub(r"\s+", " ", signals.get("body_text", "")).strip()
+        hints = signals.get("date_hints", [])
+    else:
+        dt_meta = _find_date_in_metadata(page.document)
+        text_to_search = None
+
     # Step 2: Check structured metadata (very reliable)
-    if (dt_meta := _find_date_in_metadata(soup))[0]:
+    if dt_meta[0]:
         return dt_meta[0].strftime("%m/%Y"), dt_meta[1]
 
     # Step 3: Perform the improved search on visible page text
-    text_to_search = soup.get_text(separator=' ', strip=True)
-    if dt := _find_date_in_visible_text(soup, text_to_search):
+    if text_to_search is None:
+        text_to_search = page.document.text(separator=' ', strip=True)
+        dt = _find_date_in_visible_text(page.document, text_to_search)
+    else:
+        dt = _find_date_in_hints(hints, text_to_search)
+    if dt:
         return dt.strftime("%m/%Y"), "body_text_targeted"
 
     # Step 4: As a last resort, check for a copyright year
@@ -151,12 +166,15 @@ def find_best_date_on_page(url: str) -> Tuple[Optional[str], str]:
 
     return None, "not_found"
 
-def date_pdf (url: str):
+def date_pdf (url: str, page: Page = None):
     try:
-        response = requests.get(url, timeout=10)
-        doc = fitz.open(stream=BytesIO(response.content), filetype="pdf")
-
-        metadata = doc.metadata
+        # Only the metadata is needed, so try byte-range reads before downloading the whole file
+        metadata = read_pdf_info(url) if page is None else None
+        if not metadata or "modDate" not in metadata:
+            if page is None:
+                page = fetch_page(url, headers={'User-Agent': USER_AGENT}, timeout=10)
+            doc = fitz.open(stream=BytesIO(page.content), filetype="pdf")
+            metadata = doc.metadata
         mod_date = metadata.get("modDate", "No modification date found")
         y = mod_date[2:6]
         m = mod_date[6:8]
@@ -167,9 +185,9 @@ def date_pdf (url: str):
         return "Not found"
 
 
-def date_me(url):
+def date_me(url, page: Page = None):
     try:
-        found_date, method = find_best_date_on_page(url)
+        found_date, method = find_best_date_on_page(url, page=page)
         # print(f"\n--- Results for: {url} ---")
         # print(f"Date: {found_date}")
         # print(f"Method: {method}\n")
@@ -0,0 +1,437 @@
+import os
+import re
+from functools import cached_property, lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+from extract import boilerplate
+from extract.keywords import keyword_pattern
+try:
+    from bs4 import BeautifulSoup, NavigableString, Tag
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+# --- Configuration Constants ---
+# "lxml" (default) or "selectolax" parse at C speed; "bs4" (html.parser) is slow but forgiving and is
+# what malformed pages fall back to when the fast parser fails or loses the body.
+PARSER_BACKEND = os.environ.get("HTML_PARSER", "lxml").lower()
+ALWAYS_DROPPED = ("script", "style", "template")  # never part of a page's text (matches bs4's get_text)
+NON_CONTENT_TAGS = ("script", "style", "nav", "footer", "aside", "header")
+BOILERPLATE_TAGS = NON_CONTENT_TAGS + ("noscript", "[role='navigation']", "[role='banner']", "[role='contentinfo']")
+MAIN_CONTENT_SELECTORS = ['article', 'main', '.post-body', '.entry-content', '.td-post-content']
+EMPTY_HTML = "<html><body></body></html>"
+PRESERVE_WHITESPACE_TAGS = ("pre", "textarea")
+ASCII_SPACES = " \n\t\x0c\r"  # what bs4 counts as whitespace (not &nbsp;)
+# An HTML5 parser (lexbor) drops the newline right after <pre>/<textarea>; libxml2, and so the old
+# BeautifulSoup(html, "lxml") code, keeps it. Doubling it before lexbor parses keeps the original.
+PRESERVE_NEWLINE = re.compile(r"""(<(?:pre|textarea)\b(?:[^>"']|"[^"]*"|'[^']*')*>)(?=\r?\n)""", re.IGNORECASE)
+_PARSER = lxml.html.HTMLParser(encoding="utf-8", remove_comments=False)
+
+
+@lru_cache(maxsize=256)
+def _selector(css: str) -> CSSSelector:
+    return CSSSelector(css, translator="html")
+
+
+def _collapse(text: str, preserve: bool) -> str:
+    """Whitespace-only strings outside <pre>/<textarea> become a single newline or space, as in BeautifulSoup."""
+    if preserve or text.strip(ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def _join(strings: Iterable[str], separator: str, strip: bool) -> str:
+    if strip:
+        strings = (s.strip() for s in strings)
+        strings = (s for s in strings if s)
+    return separator.join(strings)
+
+
+def _hint(class_name: Optional[str], element_id: Optional[str]) -> str:
+    return f"{class_name or ''} {element_id or ''}"
+
+
+# --- Backends ---
+# Each backend answers the same few questions about a parsed page. `drop` is a tuple of CSS selectors
+# whose matches (and everything inside them) are left out, as if they had been decomposed first.
+# events() walks <body> once for extract.boilerplate: (START, tag, class/id hint), (TEXT, string), (END,).
+
+class _LxmlTree:
+    name = "lxml"
+
+    def __init__(self, html: str):
+        self.root = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"), parser=_PARSER)
+
+    def is_empty(self) -> bool:
+        body = self.root.find("body")
+        return body is None or (len(body) == 0 and not (body.text or "").strip())
+
+    def _dropped(self, drop: Tuple[str, ...]) -> set:
+        return {el for css in drop for el in _selector(css)(self.root)}
+
+    @staticmethod
+    def _kept(elements: list, dropped: set) -> list:
+        if not dropped:
+            return elements
+        return [el for el in elements if el not in dropped and not any(a in dropped for a in el.iterancestors())]
+
+    @classmethod
+    def _strings(cls, node, dropped: set) -> Iterator[str]:
+        """Text nodes under `node` in document order, skipping comments and dropped elements (but not their tails)."""
+        preserve = sum(1 for el in node.iterancestors() if el.tag in PRESERVE_WHITESPACE_TAGS)
+        preserve += node.tag in PRESERVE_WHITESPACE_TAGS
+        if text := node.text:
+            yield _collapse(text, preserve)
+        stack = [(node, iter(node))]
+        while stack:
+            el, children = stack[-1]
+            for child in children:
+                # comments and PIs have non-str tags
+                if isinstance(child.tag, str) and child.tag not in ALWAYS_DROPPED and child not in dropped:
+                    preserve += child.tag in PRESERVE_WHITESPACE_TAGS
+                    if text := child.text:
+                        yield _collapse(text, preserve)
+                    stack.append((child, iter(child)))
+                    break
+                if child.tail:
+                    yield _collapse(child.tail, preserve)
+            else:
+                stack.pop()
+                if el is not node:
+                    preserve -= el.tag in PRESERVE_WHITESPACE_TAGS
+                    if el.tail:
+                        yield _collapse(el.tail, preserve)
+
+    def texts(self, selector: Optional[str], separator: str, strip: bool, drop: Tuple[str, ...],
+              within: Optional[str] = None, first: bool = False) -> List[str]:
+        dropped = self._dropped(drop)
+        scope = self.root
+        if within:
+            scopes = self._kept(_selector(within)(self.root), dropped)
+            if not scopes:
+                return []
+            scope = scopes[0]
+        matches = self._kept(_selector(selector)(scope), dropped) if selector else [scope]
+        return [_join(self._strings(el, dropped), separator, strip) for el in matches[:1 if first else None]]
+
+    def attrs(self, selector: str, name: str) -> List[Optional[str]]:
+        return [el.get(name) for el in _selector(selector)(self.root)]
+
+    def items(self, selector: str, name: str) -> List[Tuple[str, Optional[str]]]:
+        # Like get_text(), no text for elements inside <template> (or script/style)
+        return [("" if any(a.tag in ALWAYS_DROPPED for a in el.iterancestors())
+                 else _join(self._strings(el, set()), "", False), el.get(name)) for el in _selector(selector)(self.root)]
+
+    def events(self, drop: Tuple[str, ...]) -> Iterator[tuple]:
+        dropped = self._dropped(drop)
+        body = self.root.find("body")
+        node = self.root if body is None else body
+        yield boilerplate.START, node.tag, _hint(node.get("class"), node.get("id"))
+        if node.text:
+            yield boilerplate.TEXT, node.text
+        stack = [(node, iter(node))]
+        while stack:
+            el, children = stack[-1]
+            for child in children:
+                if isinstance(child.tag, str) and child.tag not in ALWAYS_DROPPED and child not in dropped:
+                    yield boilerplate.START, child.tag, _hint(child.get("class"), child.get("id"))
+                    if text := child.text:
+                        yield boilerplate.TEXT, text
+                    stack.append((child, iter(child)))
+                    break
+                if child.tail:
+                    yield boilerplate.TEXT, child.tail
+            else:
+                stack.pop()
+                yield (boilerplate.END,)
+                if el is not node and el.tail:
+                    yield boilerplate.TEXT, el.tail
+
+    def elements(self, tag: str) -> List[Tuple[Dict[str, str], str]]:
+        return [(dict(el.attrib), el.text or "") for el in self.root.iter(tag)]
+
+
+class _SelectolaxTree:
+    name = "selectolax"
+
+    def __init__(self, html: str):
+        self.html = PRESERVE_NEWLINE.sub(r"\1\n", html)
+        self.tree = LexborHTMLParser(self.html)
+        self._stripped = {}
+
+    def is_empty(self) -> bool:
+        body = self.tree.body
+        return body is None or body.child is None
+
+    def _tree_without(self, drop: Tuple[str, ...]):
+        """A separate parse with `drop` (and script/style/template) removed; lexbor re-parses very cheaply."""
+        key = tuple(sorted(set(drop)))
+        if key not in self._stripped:
+            tree = LexborHTMLParser(self.html)
+            tree.strip_tags(list(ALWAYS_DROPPED))
+            for css in key:
+                for node in tree.css(css):
+                    node.decompose()
+            self._stripped[key] = tree
+        return self._stripped[key]
+
+    def texts(self, selector: Optional[str], separator: str, strip: bool, drop: Tuple[str, ...],
+              within: Optional[str] = None, first: bool = False) -> List[str]:
+        tree = self._tree_without(drop)
+        scope = tree.css_first(within) if within else tree.root
+        if scope is None:
+            return []
+        matches = scope.css(selector) if selector else [scope]
+        return [_join(self._strings(node), separator, strip) for node in matches[:1 if first else None]]
+
+    @staticmethod
+    def _strings(node) -> Iterator[str]:
+        for child in node.traverse(include_text=True):
+            if child.tag == "-text":
+                text = child.text_content
+                if text.strip(ASCII_SPACES):
+                    yield text
+                else:
+                    parent, preserve = child.parent, False
+                    while parent is not None and not preserve:
+                        preserve, parent = parent.tag in PRESERVE_WHITESPACE_TAGS, parent.parent
+                    yield _collapse(text, preserve)
+
+    def attrs(self, selector: str, name: str) -> List[Optional[str]]:
+        return [node.attributes.get(name) for node in self.tree.css(selector)]
+
+    def items(self, selector: str, name: str) -> List[Tuple[str, Optional[str]]]:
+        # Text and attribute from the same node of the same tree, so the pairs can't shift
+        return [(_join(self._strings(node), "", False), node.attributes.get(name))
+                for node in self._tree_without(()).css(selector)]
+
+    def events(self, drop: Tuple[str, ...]) -> Iterator[tuple]:
+        tree = self._tree_without(drop)
+        node = tree.body or tree.root
+        yield boilerplate.START, node.tag, _hint(node.attributes.get("class"), node.attributes.get("id"))
+        stack = [node.iter(include_text=True)]
+        while stack:
+            for child in stack[-1]:
+                if child.tag == "-text":
+                    yield boilerplate.TEXT, child.text_content
+                elif not child.tag.startswith(("_", "!")):  # comments and doctype
+                    yield boilerplate.START, child.tag, _hint(child.attributes.get("class"), child.attributes.get("id"))
+                    stack.append(child.iter(include_text=True))
+                    break
+            else:
+                stack.pop()
+                yield (boilerplate.END,)
+
+    def elements(self, tag: str) -> List[Tuple[Dict[str, str], str]]:
+        return [({k: v or "" for k, v in node.attributes.items()}, node.text(deep=True))
+                for node in self.tree.css(tag)]
+
+
+class _SoupTree:
+    name = "bs4"
+
+    def __init__(self, html: str):
+        self.soup = BeautifulSoup(html, "html.parser")
+
+    def is_empty(self) -> bool:
+        return not self.soup.contents
+
+    def _dropped(self, drop: Tuple[str, ...]) -> set:
+        return {id(tag) for css in drop for tag in self.soup.select(css)}
+
+    @staticmethod
+    def _kept(tags: list, dropped: set) -> list:
+        if not dropped:
+            return tags
+        return [tag for tag in tags if id(tag) not in dropped and not any(id(p) in dropped for p in tag.parents)]
+
+    @staticmethod
+    def _strings(node, dropped: set) -> Iterator[str]:
+        for string in node.strings:  # already skips comments, script, style and template
+            if not dropped or not any(id(parent) in dropped for parent in string.parents):
+                yield string
+
+    def texts(self, selector: Optional[str], separator: str, strip: bool, drop: Tuple[str, ...],
+              within: Optional[str] = None, first: bool = False) -> List[str]:
+        dropped = self._dropped(drop)
+        scope = self.soup
+        if within:
+            scopes = self._kept(self.soup.select(within), dropped)
+            if not scopes:
+                return []
+            scope = scopes[0]
+        matches = self._kept(scope.select(selector), dropped) if selector else [scope]
+        return [_join(self._strings(tag, dropped), separator, strip) for tag in matches[:1 if first else None]]
+
+    def events(self, drop: Tuple[str, ...]) -> Iterator[tuple]:
+        dropped = self._dropped(drop)
+        node = self.soup.body or self.soup
+        yield boilerplate.START, node.name, _hint(" ".join(node.get("class") or []), node.get("id"))
+        stack = [iter(node.children)]
+        while stack:
+            for child in stack[-1]:
+                if type(child) is NavigableString:  # not comments, doctype or CDATA
+                    yield boilerplate.TEXT, str(child)
+                elif isinstance(child, Tag) and child.name not in ALWAYS_DROPPED and id(child) not in dropped:
+                    yield boilerplate.START, child.name, _hint(" ".join(child.get("class") or []), child.get("id"))
+                    stack.append(iter(child.children))
+                    break
+            else:
+                stack.pop()
+                yield (boilerplate.END,)
+
+    def attrs(self, selector: str, name: str) -> List[Optional[str]]:
+        values = [tag.get(name) for tag in self.soup.select(selector)]
+        return [" ".join(v) if isinstance(v, list) else v for v in values]
+
+    def items(self, selector: str, name: str) -> List[Tuple[str, Optional[str]]]:
+        return [(_join(self._strings(tag, set()), "", False),
+                 " ".join(value) if isinstance(value := tag.get(name), list) else value)
+                for tag in self.soup.select(selector)]
+
+    def elements(self, tag: str) -> List[Tuple[Dict[str, str], str]]:
+        return [({k: " ".join(v) if isinstance(v, list) else v for k, v in el.attrs.items()}, el.get_text())
+                for el in self.soup.find_all(tag)]
+
+
+BACKENDS = {"lxml": _LxmlTree}
+if SELECTOLAX_AVAILABLE:
+    BACKENDS["selectolax"] = _SelectolaxTree
+if BS4_AVAILABLE:
+    BACKENDS["bs4"] = _SoupTree
+
+
+def _parse(html: str, backend: str):
+    """Parses with `backend`, falling back to bs4's forgiving html.parser when the fast parser fails."""
+    tree_class = BACKENDS.get(backend, _LxmlTree)
+    if not html.strip():
+        return tree_class(EMPTY_HTML)
+    try:
+        tree = tree_class(html)
+        if not (tree.is_empty() and "<body" in html.lower()):
+            return tree
+    except (etree.ParserError, ValueError):
+        pass
+    if BS4_AVAILABLE and tree_class is not _SoupTree:
+        return _SoupTree(html)
+    return tree_class(EMPTY_HTML)
+
+
+class Document:
+    """
+    A page parsed once and shared by every HTML extractor (context, date, social links),
+    so none of them builds its own BeautifulSoup. Use Page.document to get the one for a fetched page.
+    The parser is chosen with HTML_PARSER (see PARSER_BACKEND); every backend gives the same results.
+    """
+
+    def __init__(self, html: str, backend: str = PARSER_BACKEND):
+        self.html = html or ""
+        self.tree = _parse(self.html, backend)
+        self._outlines = {}  # drop selectors -> (outline root, scored candidates)
+
+    def __bool__(self) -> bool:
+        return bool(self.html)
+
+    @classmethod
+    def of(cls, html_or_document) -> "Document":
+        """Accepts raw HTML or an existing Document, so extractors can be handed either."""
+        return html_or_document if isinstance(html_or_document, Document) else cls(html_or_document)
+
+    @property
+    def backend(self) -> str:
+        """Name of the parser that actually parsed this page (after any fallback)."""
+        return self.tree.name
+
+    # --- Text ---
+
+    def text(self, separator: str = " ", drop: Iterable[str] = (), selector: str = None,
+             strip: bool = False) -> Optional[str]:
+        """
+        Text of the whole page, or of the first element matching `selector` (None if nothing matches),
+        leaving out elements matching the CSS selectors in `drop`.
+        Like BeautifulSoup's get_text(separator, strip) on a decomposed copy.
+        """
+        texts = self.tree.texts(selector, separator, strip, tuple(drop), first=True)
+        return texts[0] if texts else None
+
+    def clean_text(self) -> str:
+        """Visible text without nav/header/footer/aside/script/style, whitespace collapsed."""
+        return re.sub(r"\s+", " ", self.text(drop=NON_CONTENT_TAGS)).strip()
+
+    def texts(self, selector: str, separator: str = "", strip: bool = False, drop: Iterable[str] = (),
+              within: str = None) -> List[str]:
+        """
+        Text of every element matching `selector`, in document order. `within` limits the search to
+        the first element matching that selector; elements inside `drop` matches are skipped.
+        """
+        return self.tree.texts(selector, separator, strip, tuple(drop), within=within)
+
+    def attrs(self, selector: str, name: str) -> List[Optional[str]]:
+        """Attribute `name` of every element matching `selector` (None where it is missing)."""
+        return self.tree.attrs(selector, name)
+
+    def items(self, selector: str, name: str) -> List[Tuple[str, Optional[str]]]:
+        """(text, attribute `name`) of every element matching `selector`, both read from the same element."""
+        return self.tree.items(selector, name)
+
+    def main_content(self, separator: str = " ") -> Optional[str]:
+        """Text of the first article/main/post-body style container, or None if the page has none."""
+        for selector in MAIN_CONTENT_SELECTORS:
+            text = self.text(separator=separator, selector=selector)
+            if text is not None:
+                return text
+        return None
+
+    def content_blocks(self, keyword: str = None, drop: Iterable[str] = BOILERPLATE_TAGS) -> List[str]:
+        """
+        Paragraph-level text blocks of the page's main content, found in one pass by scoring blocks on
+        text and link density (see extract.boilerplate). Navigation, cookie banners, footers and link
+        lists are left behind. When `keyword` is given but the main content never mentions it, the blocks
+        of the whole page are returned instead, so a mention outside the article is not lost.
+        """
+        drop = tuple(drop)
+        if drop not in self._outlines:
+            self._outlines[drop] = boilerplate.outline(self.tree.events(drop))
+        root, candidates = self._outlines[drop]
+        found = boilerplate.blocks(boilerplate.main_nodes(root, candidates))
+        if keyword and not any(keyword_pattern(keyword).search(block) for block in found):
+            page = boilerplate.blocks([root] if root else [])
+            if any(keyword_pattern(keyword).search(block) for block in page):
+                return page
+        return found
+
+    def content_text(self, keyword: str = None, separator: str = " ", drop: Iterable[str] = BOILERPLATE_TAGS) -> str:
+        """The main content as one string, blocks joined by `separator`; see content_blocks()."""
+        return separator.join(self.content_blocks(keyword, drop))
+
+    # --- Structured Data ---
+
+    @cached_property
+    def meta(self) -> Dict[str, str]:
+        """{name / property / itemprop: content} for every <meta> tag; the first tag wins."""
+        meta = {}
+        for attrs, _ in self.tree.elements("meta"):
+            key = attrs.get("name") or attrs.get("property") or attrs.get("itemprop")
+            content = attrs.get("content")
+            if key and content is not None and key not in meta:
+                meta[key] = content
+        return meta
+
+    @cached_property
+    def json_ld(self) -> List[str]:
+        """Raw text of every <script type="application/ld+json"> block."""
+        return [text for attrs, text in self.tree.elements("script")
+                if (attrs.get("type") or "").strip().lower() == "application/ld+json"]
+
+    @cached_property
+    def anchors(self) -> List[str]:
+        """href of every <a> in document order."""
+        return [attrs["href"] for attrs, _ in self.tree.elements("a") if attrs.get("href")]
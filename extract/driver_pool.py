@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import shutil
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+    WEBDRIVER_MANAGER_AVAILABLE = True
+except ImportError:
+    WEBDRIVER_MANAGER_AVAILABLE = False
+
+# --- Configuration Constants ---
+POOL_SIZE = int(os.environ.get("DRIVER_POOL_SIZE", "2"))
+MAX_PAGES_PER_DRIVER = int(os.environ.get("DRIVER_MAX_PAGES", "40"))
+MAX_DRIVER_MEMORY_MB = int(os.environ.get("DRIVER_MAX_MEMORY_MB", "1500"))
+MAX_DRIVER_AGE = int(os.environ.get("DRIVER_MAX_AGE", "1800"))  # seconds a browser is reused at most, 0 = no limit
+ACQUIRE_TIMEOUT = 120
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")  # pins the driver binary; no lookup at all
+CHROMEDRIVER_RECORD = os.environ.get("CHROMEDRIVER_RECORD", ".cache/chromedriver.json")
+CHROMEDRIVER_RECHECK = 7 * 24 * 3600  # seconds before webdriver_manager is asked for a newer driver
+
+
+class PooledDriver:
+    """A live Chrome WebDriver plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.time()
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def memory_mb(self) -> Optional[float]:
+        """Resident memory of chromedriver and every Chrome process it spawned, or None if unknown."""
+        if not PSUTIL_AVAILABLE:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs if p.is_running()) / (1024 * 1024)
+        except Exception:
+            return None
+
+    def is_alive(self) -> bool:
+        """Cheap round-trip to the browser; fails if Chrome or chromedriver has crashed."""
+        try:
+            _ = self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
+    """
+    Fixed-size pool of warm, reusable headless Chrome drivers.
+    Drivers are reset between pages, recycled after `max_pages` pages, `max_age` seconds or when they
+    grow past `max_memory_mb`, and replaced transparently when they crash.
+    """
+
+    def __init__(self, factory: Callable, size: int = POOL_SIZE, max_pages: int = MAX_PAGES_PER_DRIVER,
+                 max_memory_mb: int = MAX_DRIVER_MEMORY_MB, max_age: int = MAX_DRIVER_AGE):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.max_age = max_age
+        self._idle = []
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    # --- Lifecycle ---
+
+    def warm_up(self, count: Optional[int] = None):
+        """Start up to `count` browsers ahead of time so the first pages don't pay the startup cost."""
+        count = self.size if count is None else min(count, self.size)
+        with self._cond:
+            to_start = max(0, count - self._live)
+            self._live += to_start
+        for _ in range(to_start):
+            try:
+                pooled = PooledDriver(self.factory())
+            except Exception:
+                with self._cond:
+                    self._live -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def close(self):
+        """Quits every idle driver; drivers currently checked out are quit when they are released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            pooled.quit()
+
+    # --- Checkout / Return ---
+
+    def acquire(self, timeout: float = ACQUIRE_TIMEOUT) -> PooledDriver:
+        """Returns an idle driver, starting a new one if the pool is below its size limit."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.size:
+                    self._live += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser became available within {timeout}s")
+                self._cond.wait(remaining)
+
+        try:
+            return PooledDriver(self.factory())
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, pooled: PooledDriver, broken: bool = False):
+        """Returns a driver to the pool, quitting it instead if it is broken, worn out, too old or too large."""
+        pooled.pages_served += 1
+        retire = broken or self._closed or not pooled.is_alive() or pooled.pages_served >= self.max_pages
+        if not retire and self.max_age and pooled.age() >= self.max_age:
+            print(f"|   [pool] Recycling browser after {pooled.age() / 60:.0f} minutes and {pooled.pages_served} pages")
+            retire = True
+        if not retire:
+            memory = pooled.memory_mb()
+            if memory is not None and memory > self.max_memory_mb:
+                print(f"|   [pool] Recycling browser using {memory:.0f} MB after {pooled.pages_served} pages")
+                retire = True
+        if not retire:
+            retire = not self._reset(pooled)
+
+        if retire:
+            pooled.quit()
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: float = ACQUIRE_TIMEOUT):
+        """
+        Context manager yielding a ready-to-use selenium driver.
+        If the block raises and the browser no longer responds, the driver is discarded and restarted.
+        """
+        pooled = self.acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            broken = not pooled.is_alive()
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _reset(pooled: PooledDriver) -> bool:
+        """Clears cookies, storage and extra tabs so the next page starts from a clean state."""
+        driver = pooled.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass  # about:blank and some origins deny storage access
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+
+# --- ChromeDriver Binary ---
+_driver_path: Optional[str] = None
+_driver_path_resolved = False
+_driver_path_lock = threading.Lock()
+
+
+def _load_driver_record() -> Optional[dict]:
+    try:
+        with open(CHROMEDRIVER_RECORD, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        return record if os.path.isfile(record.get("path", "")) else None
+    except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+        return None
+
+
+def _save_driver_record(path: str):
+    try:
+        os.makedirs(os.path.dirname(CHROMEDRIVER_RECORD) or ".", exist_ok=True)
+        with open(CHROMEDRIVER_RECORD, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "resolved_at": time.time()}, f)
+    except IOError as e:
+        print(f"  [WARNING] Could not save chromedriver location: {e}")
+
+
+def chromedriver_path() -> Optional[str]:
+    """
+    Resolves the chromedriver binary once per process instead of once per browser start.
+    Order: CHROMEDRIVER_PATH, the location recorded by an earlier run (re-checked weekly),
+    webdriver_manager, chromedriver on PATH. Returns None to let Selenium Manager find one.
+    A recorded or PATH driver is used when webdriver_manager fails, so offline runs still start.
+    """
+    global _driver_path, _driver_path_resolved
+    with _driver_path_lock:
+        if _driver_path_resolved:
+            return _driver_path
+
+        path = CHROMEDRIVER_PATH
+        record = None if path else _load_driver_record()
+        if not path and record and time.time() - record.get("resolved_at", 0) < CHROMEDRIVER_RECHECK:
+            path = record["path"]
+        if not path and WEBDRIVER_MANAGER_AVAILABLE:
+            try:
+                path = ChromeDriverManager().install()
+                _save_driver_record(path)
+            except Exception as e:
+                print(f"  [WARNING] webdriver_manager could not resolve chromedriver: {e}")
+        if not path and record:
+            path = record["path"]  # stale but present: better than no browser
+        if not path:
+            path = shutil.which("chromedriver")
+
+        _driver_path, _driver_path_resolved = path, True
+        return path
+
+
+# --- Shared Pool ---
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(factory: Callable) -> DriverPool:
+    """Returns the process-wide driver pool, creating it with `factory` on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = DriverPool(factory)
+        return _pool
+
+
+@atexit.register
+def close_pool():
+    """Quits every pooled browser; registered at exit so batch runs never leak Chrome processes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
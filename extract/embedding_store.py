@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# --- Configuration Constants ---
+EMBEDDING_STORE_DIR = os.environ.get("EMBEDDING_STORE_DIR", ".cache/embeddings")
+# "normal": reuse stored embeddings and store new ones | "readonly": reuse only | "off": always run the model
+EMBEDDING_STORE_MODE = os.environ.get("EMBEDDING_STORE_MODE", "normal").lower()
+STORE_GROWTH_ROWS = 16384  # the vector file grows by at least this many rows at a time
+DIGEST_SIZE = 16  # bytes of blake2b per sentence
+
+
+def sentence_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class _ModelStore:
+    """
+    Stored embeddings of one model. vectors.f16 is a memory-mapped float16 matrix with one row per sentence;
+    keys.bin holds the digest of each row's sentence in row order, and the digest -> row index is rebuilt
+    from it on open. Vectors are written before their keys, so a key never points at a missing row, and
+    appends hold a file lock so several processes can share one store.
+    """
+
+    def __init__(self, directory: str, readonly: bool):
+        self.directory = directory
+        self.readonly = readonly
+        self.dim: Optional[int] = None
+        self.rows: Dict[bytes, int] = {}
+        self._count = 0  # rows that have a key
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._read_meta()
+
+    def _read_meta(self):
+        """Opens a store that exists on disk (possibly created by another process since the last call)."""
+        if self.dim is None and os.path.exists(self._path("meta.json")):
+            with open(self._path("meta.json"), "r") as f:
+                self.dim = json.load(f)["dim"]
+            self._read_keys()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._path("lock"), "a") as f:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_keys(self):
+        """Indexes the keys added since the last read, by this process or another one."""
+        try:
+            with open(self._path("keys.bin"), "rb") as f:
+                f.seek(self._count * DIGEST_SIZE)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        added = len(data) // DIGEST_SIZE  # a torn trailing record is overwritten by the next append
+        for i in range(added):
+            self.rows.setdefault(data[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE], self._count + i)
+        self._count += added
+
+    def _map(self, rows_needed: int):
+        """Maps vectors.f16, growing the file first when it holds fewer than `rows_needed` rows."""
+        path = self._path("vectors.f16")
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        capacity = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        if capacity < rows_needed and not self.readonly:
+            self._vectors = None  # unmap before resizing
+            capacity = max(rows_needed, capacity * 2, STORE_GROWTH_ROWS)
+            with open(path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        if self._vectors is None or capacity != self._capacity:
+            self._vectors = np.memmap(path, dtype=np.float16, mode="r" if self.readonly else "r+",
+                                      shape=(capacity, self.dim)) if capacity else None
+            self._capacity = capacity
+
+    def get(self, digests: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """The stored vector (float32) of every digest that has one."""
+        with self._lock:
+            self._read_meta()
+            if self.dim is None:
+                return {}
+            if any(digest not in self.rows for digest in digests):
+                self._read_keys()
+            found = {digest: self.rows[digest] for digest in digests if digest in self.rows}
+            if not found:
+                return {}
+            self._map(max(found.values()) + 1)
+            vectors = np.asarray(self._vectors[list(found.values())], dtype=np.float32)
+            return dict(zip(found, vectors))
+
+    def add(self, digests: List[bytes], vectors: np.ndarray):
+        """Stores the vectors of digests that are not stored yet."""
+        if self.readonly or not digests:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with self._file_lock():
+                if not os.path.exists(self._path("meta.json")):
+                    with open(self._path("meta.json"), "w") as f:
+                        json.dump({"dim": int(vectors.shape[1]), "dtype": "float16"}, f)
+                self._read_meta()
+                if vectors.shape[1] != self.dim:
+                    print(f"  [WARNING] Embedding store {self.directory} holds {self.dim}-d vectors, "
+                          f"got {vectors.shape[1]}-d; not storing them.")
+                    return
+                self._read_keys()
+                new = {}
+                for digest, vector in zip(digests, vectors):
+                    if digest not in self.rows:
+                        new.setdefault(digest, vector)
+                if not new:
+                    return
+                start = self._count
+                self._map(start + len(new))
+                self._vectors[start:start + len(new)] = np.stack(list(new.values())).astype(np.float16)
+                self._vectors.flush()
+                with open(self._path("keys.bin"), "ab") as f:
+                    f.truncate(start * DIGEST_SIZE)  # drop a torn record left by a crash
+                    f.write(b"".join(new))
+                for row, digest in enumerate(new, start):
+                    self.rows[digest] = row
+                self._count = start + len(new)
+
+
+class EmbeddingStore:
+    """
+    Persistent sentence embeddings, so boilerplate repeated across pages and runs is encoded only once.
+    One _ModelStore per model (see extract.embeddings, which tags each model with its embedding_key);
+    models without a key always go straight to encode().
+
+        vectors = embedding_store.encode(model, sentences, batch_size=128)
+    """
+
+    def __init__(self, store_dir: str = EMBEDDING_STORE_DIR, mode: str = EMBEDDING_STORE_MODE):
+        self.store_dir = store_dir
+        self.mode = mode
+        self._models: Dict[str, _ModelStore] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _model_store(self, key: str) -> _ModelStore:
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = _ModelStore(os.path.join(self.store_dir, key), readonly=self.mode == "readonly")
+            return self._models[key]
+
+    def encode(self, model, texts: List[str], **encode_kwargs) -> np.ndarray:
+        """model.encode(texts) as a float32 matrix; the model only sees texts the store does not hold yet."""
+        key = getattr(model, "embedding_key", None)
+        if not self.enabled or key is None or not texts:
+            return np.asarray(model.encode(texts, convert_to_numpy=True, **encode_kwargs), dtype=np.float32)
+        store = self._model_store(key)
+        digests = [sentence_digest(text) for text in texts]
+        vectors = store.get(digests)
+        missing = list(dict.fromkeys(digest for digest in digests if digest not in vectors))
+        if missing:
+            text_of = dict(zip(digests, texts))
+            encoded = np.asarray(model.encode([text_of[digest] for digest in missing], convert_to_numpy=True,
+                                              **encode_kwargs), dtype=np.float16)
+            store.add(missing, encoded)
+            # float16 like the stored copies, so a sentence scores the same on every run
+            vectors.update(zip(missing, encoded.astype(np.float32)))
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return np.stack([vectors[digest] for digest in digests])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"models": len(self._models), "hits": self.hits, "misses": self.misses}
+
+
+# Process-wide store shared by every analyzer
+embedding_store = EmbeddingStore()
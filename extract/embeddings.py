@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import platform
+import threading
+from typing import Dict, Tuple
+
+from sentence_transformers import SentenceTransformer
+try:
+    import onnxruntime
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# --- Configuration Constants ---
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# How sentences are embedded:
+#   "torch" - the PyTorch SentenceTransformer (default, the old behaviour)
+#   "onnx"  - EXPERIMENTAL: the same model as an int8 dynamically quantized ONNX graph on onnxruntime's CPU
+#             provider. It is only used once test_embedding_parity.py has passed for that model and
+#             quantization on this machine (see ONNX_PARITY_RECORD); until then torch is loaded instead.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0"))  # intra-op CPU threads, 0 = library default
+# Quantized graph to use: "arm64", "avx2", "avx512" or "avx512_vnni"; empty = pick from the CPU's flags
+ONNX_QUANTIZATION = os.environ.get("ONNX_QUANTIZATION", "").lower()
+ONNX_EXPORT_DIR = os.environ.get("ONNX_EXPORT_DIR", "onnx_models")  # local exports for models without published graphs
+ONNX_PARITY_RECORD = os.path.join(ONNX_EXPORT_DIR, "parity.json")  # passing test_embedding_parity.py runs
+ONNX_REQUIRE_PARITY = os.environ.get("ONNX_REQUIRE_PARITY", "1") != "0"  # 0 = use onnx without a recorded check
+# File name suffixes sentence-transformers uses for its quantized exports (and the hub publishes for MiniLM)
+QUANTIZED_FILE_SUFFIXES = {
+    "arm64": "qint8_arm64",
+    "avx2": "quint8_avx2",
+    "avx512": "qint8_avx512",
+    "avx512_vnni": "qint8_avx512_vnni",
+}
+
+_models: Dict[Tuple[str, str, int, bool], SentenceTransformer] = {}
+_lock = threading.Lock()
+
+
+def cpu_quantization() -> str:
+    """The quantization config that suits this CPU best."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = set(f.read().split())
+    except OSError:
+        return "avx2"
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512f" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def embedding_key(model: str, variant: str) -> str:
+    """Names one model variant, e.g. in the persistent embedding store (extract/embedding_store.py)."""
+    return f"{model.replace('/', '__')}-{variant}"
+
+
+def _parity_records() -> Dict[str, dict]:
+    try:
+        with open(ONNX_PARITY_RECORD, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def record_parity(key: str, result: dict):
+    """Stores a passing parity check for the model variant `key`, which lets load_model() use it."""
+    records = _parity_records()
+    records[key] = dict(result, checked_at=int(time.time()))
+    os.makedirs(os.path.dirname(ONNX_PARITY_RECORD) or ".", exist_ok=True)
+    with open(ONNX_PARITY_RECORD, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2)
+
+
+def _load_torch(model: str, threads: int) -> SentenceTransformer:
+    if threads:
+        import torch
+        torch.set_num_threads(threads)  # process-wide in torch
+    return SentenceTransformer(model, device="cpu")
+
+
+def _quantization() -> str:
+    quantization = ONNX_QUANTIZATION or cpu_quantization()
+    if quantization not in QUANTIZED_FILE_SUFFIXES:
+        print(f"  [WARNING] Unknown ONNX_QUANTIZATION {quantization!r}; using {cpu_quantization()}.")
+        quantization = cpu_quantization()
+    return quantization
+
+
+def _load_onnx(model: str, threads: int, quantization: str) -> SentenceTransformer:
+    file_name = f"onnx/model_{QUANTIZED_FILE_SUFFIXES[quantization]}.onnx"
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    model_kwargs = {"file_name": file_name, "provider": "CPUExecutionProvider", "session_options": options}
+    try:
+        return SentenceTransformer(model, backend="onnx", model_kwargs=model_kwargs)
+    except Exception as e:
+        # No published graph for this model or CPU: quantize a local export once and reuse it
+        local = os.path.join(ONNX_EXPORT_DIR, model.replace("/", "__"))
+        if not os.path.exists(os.path.join(local, file_name)):
+            print(f"|   [embeddings] no {file_name} for {model} ({e}); exporting it to {local}")
+            exported = SentenceTransformer(model, backend="onnx")
+            exported.save_pretrained(local)
+            export_dynamic_quantized_onnx_model(exported, quantization, local)
+        return SentenceTransformer(local, backend="onnx", model_kwargs=model_kwargs)
+
+
+def _build(model: str, backend: str, threads: int, require_parity: bool) -> SentenceTransformer:
+    if backend == "onnx" and not ONNX_AVAILABLE:
+        print("  [WARNING] EMBEDDING_BACKEND=onnx needs onnxruntime and optimum "
+              "(pip install 'sentence-transformers[onnx]'); using torch.")
+        backend = "torch"
+    elif backend not in ("onnx", "torch"):
+        print(f"  [WARNING] Unknown EMBEDDING_BACKEND {backend!r}; using torch.")
+        backend = "torch"
+    if backend == "onnx":
+        quantization = _quantization()
+        variant = f"onnx-{QUANTIZED_FILE_SUFFIXES[quantization]}"
+        if require_parity and embedding_key(model, variant) not in _parity_records():
+            print(f"  [WARNING] EMBEDDING_BACKEND=onnx is experimental and {variant} has no passing "
+                  f"test_embedding_parity.py run on record ({ONNX_PARITY_RECORD}); using torch.")
+            backend = "torch"
+    if backend == "onnx":
+        loaded = _load_onnx(model, threads, quantization)
+    else:
+        loaded = _load_torch(model, threads)
+        variant = "torch"
+    # Names this model's vectors in the persistent embedding store (extract/embedding_store.py)
+    loaded.embedding_key = embedding_key(model, variant)
+    print(f"|   [embeddings] loaded {model} ({variant}, threads={threads or 'default'})")
+    return loaded
+
+
+def load_model(model: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND, threads: int = EMBEDDING_THREADS,
+               require_parity: bool = ONNX_REQUIRE_PARITY) -> SentenceTransformer:
+    """
+    The sentence embedding model for (`model`, `backend`, `threads`), loaded once per process and shared by
+    every caller. Either backend is a SentenceTransformer, so encode() works the same way on both.
+    `require_parity=False` loads onnx without a recorded parity check (the parity and bench scripts).
+    """
+    key = (model, backend, threads, require_parity)
+    if key not in _models:
+        with _lock:
+            if key not in _models:
+                _models[key] = _build(model, backend, threads, require_parity)
+    return _models[key]
@@ -0,0 +1,174 @@
+import asyncio
+import httpx
+from collections import Counter
+from urllib.parse import urlparse
+from typing import Dict, Iterable, List, Optional, Union
+from extract.page import Page, DEFAULT_HEADERS, REQUEST_TIMEOUT
+from extract.http_cache import get_cache
+from extract.rate_limit import limiter
+from extract.host_health import host_health
+
+# --- Configuration Constants ---
+GLOBAL_CONCURRENCY = 32
+PER_HOST_CONCURRENCY = 4
+PREFETCH_BATCH_SIZE = 50
+PREFETCH_MAX_BYTES = 64 * 1024 * 1024  # page bodies held for upcoming rows; larger batches are not kept
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+class AsyncFetcher:
+    """
+    Concurrent HTTP fetcher built on one shared httpx.AsyncClient.
+    At most `max_concurrency` requests are in flight overall and at most `per_host` per hostname,
+    so a slow site only holds up its own URLs.
+
+        async with AsyncFetcher() as fetcher:
+            results = await fetcher.fetch_many(urls)
+    """
+
+    def __init__(self, max_concurrency: int = GLOBAL_CONCURRENCY, per_host: int = PER_HOST_CONCURRENCY,
+                 timeout: float = REQUEST_TIMEOUT, headers: Optional[dict] = None):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.client: Optional[httpx.AsyncClient] = None
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        self.client = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = _host(url)
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def fetch(self, url: str) -> Page:
+        """
+        Fetches one URL, going through the on-disk cache first.
+        Raises httpx.HTTPError on network errors and 4xx/5xx responses, CircuitOpenError for hosts known to be down
+        and HostNotFoundError for names that don't resolve.
+        """
+        cache = get_cache()
+        cached, fresh, validators = cache.lookup(url, "http")
+        if cached is not None and fresh:
+            return cached
+
+        await asyncio.to_thread(host_health.check, url)  # may resolve DNS; keep it off the event loop
+        await limiter.acquire_async(url)
+        async with self._host_semaphore(url), self._global:
+            with host_health.observe(url):
+                response = await self.client.get(url, headers=validators)
+                if cached is not None and response.status_code == 304:
+                    cache.touch(url, "http", dict(response.headers))
+                    return cached
+                response.raise_for_status()
+        page = Page(
+            url=url,
+            final_url=str(response.url),
+            status=response.status_code,
+            headers=dict(response.headers),
+            content=response.content,
+        )
+        if not page.is_pdf:
+            page.html = response.text
+        cache.store(page, encoding=response.encoding)
+        return page
+
+    async def fetch_many(self, urls: Iterable[str]) -> Dict[str, Union[Page, Exception]]:
+        """Fetches every URL concurrently; failures are returned as the exception instead of raised."""
+        urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+        return dict(zip(urls, results))
+
+
+def fetch_pages(urls: Iterable[str], **fetcher_kwargs) -> Dict[str, Union[Page, Exception]]:
+    """Synchronous entry point: fetches all URLs concurrently and returns {url: Page or exception}."""
+    async def _run():
+        async with AsyncFetcher(**fetcher_kwargs) as fetcher:
+            return await fetcher.fetch_many(urls)
+
+    return asyncio.run(_run())
+
+
+class Prefetcher:
+    """
+    Lets a sequential row loop use the async engine: the first time a URL is requested, it and the
+    next `batch_size` pending URLs are fetched concurrently, so following rows find their page ready.
+    `urls` has one entry per pending row; a result is kept until every row for its URL has read it
+    (call retain() when a row is re-queued). PDFs are left to their own download, and at most
+    `max_bytes` of page bodies are held at once.
+    """
+
+    def __init__(self, urls: Iterable[str], batch_size: int = PREFETCH_BATCH_SIZE,
+                 max_bytes: int = PREFETCH_MAX_BYTES, **fetcher_kwargs):
+        self._uses = Counter(url for url in urls if not url.lower().endswith(".pdf"))
+        self.urls: List[str] = list(self._uses)
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.fetcher_kwargs = fetcher_kwargs
+        self._position = {url: i for i, url in enumerate(self.urls)}
+        self._fetched = set()
+        self._results: Dict[str, Union[Page, Exception]] = {}
+        self._held_bytes = 0
+        self._last_released: Optional[tuple] = None  # (url, result) of the last URL whose rows were all served
+
+    def _keep(self, results: Dict[str, Union[Page, Exception]], force: bool = False):
+        for url, result in results.items():
+            size = len(result.content or b"") if isinstance(result, Page) else 0
+            if not force and self._held_bytes + size > self.max_bytes:
+                continue  # its row fetches it again (from the HTTP cache when that is on)
+            self._results[url] = result
+            self._held_bytes += size
+
+    def _release(self, url: str):
+        self._uses[url] -= 1
+        if self._uses[url] <= 0 and url in self._results:
+            result = self._results.pop(url)
+            if isinstance(result, Page):
+                self._held_bytes -= len(result.content or b"")
+            self._last_released = (url, result)
+
+    def retain(self, url: str):
+        """Keeps `url`'s result for one more read, e.g. by the row the RetryScheduler just re-queued."""
+        if url not in self._position:
+            return
+        self._uses[url] += 1
+        if self._last_released and self._last_released[0] == url:
+            self._keep(dict([self._last_released]), force=True)
+            self._last_released = None
+
+    def get(self, url: str) -> Optional[Page]:
+        """Returns the prefetched Page for `url`, or None if it is unknown or its fetch failed."""
+        result = self.result(url)
+        return result if isinstance(result, Page) else None
+
+    def result(self, url: str) -> Union[Page, Exception, None]:
+        """Like get(), but returns the exception when the prefetch failed, so callers need not repeat it."""
+        if url not in self._position:
+            return None
+        if url not in self._fetched:
+            start = self._position[url]
+            batch = [u for u in self.urls[start:start + self.batch_size] if u not in self._fetched]
+            print(f"|   [prefetch] Fetching {len(batch)} upcoming URLs concurrently")
+            self._keep(fetch_pages(batch, **self.fetcher_kwargs))
+            self._fetched.update(batch)
+        result = self._results.get(url)
+        self._release(url)
+        return result
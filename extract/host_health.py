@@ -0,0 +1,197 @@
+import os
+import time
+import socket
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from typing import Dict, Optional, Tuple
+
+import requests
+from extract.retry import RetryableError
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+try:
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+# --- Configuration Constants ---
+FAILURE_THRESHOLD = int(os.environ.get("HOST_FAILURE_THRESHOLD", "3"))  # consecutive failures before the circuit opens
+COOL_OFF = float(os.environ.get("HOST_COOL_OFF", "300"))                # seconds a tripped host is skipped
+MAX_COOL_OFF = 1800                                                     # cap when a host keeps failing after cool-off
+DNS_TTL = 300                                                           # seconds a DNS answer (or NXDOMAIN) is reused
+LATENCY_ALPHA = 0.3                                                     # weight of the newest sample in the latency EWMA
+HOST_DOWN_STATUSES = {502, 503, 504, 520, 521, 522, 523, 524}
+BROWSER_NETWORK_ERRORS = ("net::ERR_NAME_NOT_RESOLVED", "net::ERR_CONNECTION", "net::ERR_ADDRESS_UNREACHABLE",
+                          "net::ERR_TIMED_OUT", "net::ERR_SSL_PROTOCOL_ERROR")
+
+
+class CircuitOpenError(RetryableError):
+    """Raised instead of fetching when a host's circuit is open; `retry_after` is the remaining cool-off."""
+
+
+class HostNotFoundError(Exception):
+    """Raised instead of fetching when a host's name does not resolve; not retryable, a retry can't fix it."""
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or url).lower()
+
+
+@dataclass
+class HostHealth:
+    """Running health figures for one hostname."""
+    host: str
+    consecutive_failures: int = 0
+    total_failures: int = 0
+    total_successes: int = 0
+    latency_ewma: Optional[float] = None  # seconds
+    open_until: float = 0.0
+    cool_off: float = COOL_OFF
+    last_error: str = ""
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+
+def is_host_failure(exc: BaseException) -> bool:
+    """
+    True when `exc` says the host itself is unreachable or down (DNS, connect, timeout, 502-504).
+    Ordinary HTTP errors such as 403/404 prove the host is alive and do not count.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status in HOST_DOWN_STATUSES
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if HTTPX_AVAILABLE and isinstance(exc, (httpx.ConnectError, httpx.TimeoutException)):
+        return True
+    if SELENIUM_AVAILABLE and isinstance(exc, TimeoutException):
+        return True
+    if SELENIUM_AVAILABLE and isinstance(exc, WebDriverException):
+        return any(marker in str(exc) for marker in BROWSER_NETWORK_ERRORS)
+    return isinstance(exc, (socket.gaierror, TimeoutError, ConnectionError))
+
+
+class HostHealthRegistry:
+    """
+    Per-host circuit breaker shared by every fetch path.
+    After FAILURE_THRESHOLD consecutive host-level failures the circuit opens for COOL_OFF seconds and
+    check() fails the host's remaining rows at once with CircuitOpenError, which the RetryScheduler
+    re-queues. The first request after the cool-off is a trial: one more failure reopens the circuit
+    for twice as long, a success closes it.
+
+        host_health.check(url)
+        with host_health.observe(url):
+            response = requests.get(url, timeout=45)
+    """
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, cool_off: float = COOL_OFF, dns_ttl: float = DNS_TTL):
+        self.threshold = threshold
+        self.cool_off = cool_off
+        self.dns_ttl = dns_ttl
+        self.hosts: Dict[str, HostHealth] = {}
+        self._dns: Dict[str, Tuple[float, bool]] = {}  # host -> (expires, resolvable)
+        self._lock = threading.Lock()
+
+    def _health(self, host: str) -> HostHealth:
+        health = self.hosts.get(host)
+        if health is None:
+            health = self.hosts[host] = HostHealth(host=host, cool_off=self.cool_off)
+        return health
+
+    def resolves(self, host: str) -> bool:
+        """Cached DNS lookup so a dead domain costs one resolution per DNS_TTL instead of one per row."""
+        now = time.monotonic()
+        cached = self._dns.get(host)
+        if cached and cached[0] > now:
+            return cached[1]
+        try:
+            socket.getaddrinfo(host, None)
+            resolvable = True
+        except socket.gaierror:
+            resolvable = False
+        except OSError:
+            return True  # resolver trouble on our side; let the request decide
+        self._dns[host] = (now + self.dns_ttl, resolvable)
+        return resolvable
+
+    def check(self, url: str):
+        """Raises CircuitOpenError if `url`'s host is cooling off, HostNotFoundError if its name does not resolve."""
+        host = host_of(url)
+        with self._lock:
+            health = self._health(host)
+            remaining = health.open_until - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(f"Circuit open for {host} ({health.last_error}); retry in {remaining:.0f}s",
+                                   retry_after=remaining)
+        if not self.resolves(host):
+            self.record_failure(url, socket.gaierror(f"DNS lookup failed for {host}"))
+            raise HostNotFoundError(f"DNS lookup failed for {host}")
+
+    def record_success(self, url: str, latency: Optional[float] = None):
+        with self._lock:
+            health = self._health(host_of(url))
+            health.consecutive_failures = 0
+            health.total_successes += 1
+            health.cool_off = self.cool_off
+            if latency is not None:
+                health.latency_ewma = latency if health.latency_ewma is None else \
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * health.latency_ewma
+
+    def record_failure(self, url: str, exc: BaseException):
+        """Counts a failed request; only host-level failures move the host towards an open circuit."""
+        if not is_host_failure(exc):
+            if getattr(exc, "response", None) is not None:
+                self.record_success(url)  # the host answered, just not with what we wanted
+            return
+        with self._lock:
+            health = self._health(host_of(url))
+            trial_failed = health.open_until > 0 and health.consecutive_failures >= self.threshold
+            health.consecutive_failures += 1
+            health.total_failures += 1
+            health.last_error = type(exc).__name__
+            if health.consecutive_failures < self.threshold:
+                return
+            if trial_failed:
+                health.cool_off = min(MAX_COOL_OFF, health.cool_off * 2)
+            health.open_until = time.monotonic() + health.cool_off
+        print(f"|   [circuit] {health.host} unreachable {health.consecutive_failures}x "
+              f"({health.last_error}); skipping it for {health.cool_off:.0f}s")
+
+    @contextmanager
+    def observe(self, url: str):
+        """Times the wrapped request and records its outcome; exceptions are re-raised."""
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(url, e)
+            raise
+        self.record_success(url, time.monotonic() - start)
+
+    def summary(self) -> Dict[str, dict]:
+        """Snapshot of every host seen so far, for end-of-run reporting."""
+        with self._lock:
+            return {
+                host: {
+                    "open": health.is_open,
+                    "consecutive_failures": health.consecutive_failures,
+                    "failures": health.total_failures,
+                    "successes": health.total_successes,
+                    "latency_ewma": round(health.latency_ewma, 3) if health.latency_ewma is not None else None,
+                    "last_error": health.last_error,
+                }
+                for host, health in self.hosts.items()
+            }
+
+
+# Process-wide registry shared by every fetch path
+host_health = HostHealthRegistry()
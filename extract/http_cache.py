@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Dict, Iterator, Optional, Tuple
+from extract.page import Page, TEXT_TIER
+
+# --- Configuration Constants ---
+CACHE_DIR = os.environ.get("FETCH_CACHE_DIR", ".cache/http")
+CACHE_TTL = int(os.environ.get("FETCH_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+# "normal": serve fresh entries, revalidate stale ones | "offline": cache only, never touch the network
+# "refresh": always refetch and overwrite | "off": bypass the cache entirely
+CACHE_MODE = os.environ.get("FETCH_CACHE_MODE", "normal").lower()
+# Query parameters dropped from cache keys: well-known click and campaign trackers only, matched exactly,
+# plus the utm_* and mc_* (Mailchimp) families. Anything else may select content and is kept.
+TRACKING_PARAMS = {
+    "gclid", "gclsrc", "dclid", "gbraid", "wbraid", "gad_source", "_ga", "_gl", "fbclid", "msclkid", "yclid",
+    "twclid", "ttclid", "li_fat_id", "igshid", "mkt_tok", "_hsenc", "_hsmi", "s_kwcid", "ef_id",
+}
+TRACKING_PARAM_PREFIXES = ("utm_", "mc_")
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a URL has never been fetched."""
+
+
+def canonical_url(url: str) -> str:
+    """Normalises a URL so trivially different spellings of the same page share one cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class HttpCache:
+    """
+    Content-addressed on-disk response cache.
+    entries/<sha256(canonical url)>-<tier>.json holds headers, status, tier and fetch time;
+    bodies/<sha256(body)> holds the bytes, so identical responses are stored once.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl: int = CACHE_TTL, mode: str = CACHE_MODE):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.mode = mode
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(os.path.join(cache_dir, "entries"), exist_ok=True)
+            os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == "offline"
+
+    # --- Paths ---
+
+    def _entry_path(self, url: str, tier: str) -> str:
+        key = hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "entries", f"{key}-{tier}.json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "bodies", digest)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # --- Read ---
+
+    def _load(self, url: str, tier: str) -> Optional[dict]:
+        try:
+            with open(self._entry_path(url, tier), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _to_page(self, url: str, meta: dict) -> Optional[Page]:
+        try:
+            with open(self._body_path(meta["body"]), "rb") as f:
+                content = f.read()
+        except (FileNotFoundError, KeyError):
+            return None
+        page = Page(url=url, final_url=meta.get("final_url", url), status=meta.get("status"),
+                    headers=meta.get("headers", {}), content=content, tier=meta.get("tier", "http"))
+        if page.tier == TEXT_TIER:
+            try:
+                page = Page.from_extract(url, page.final_url, json.loads(content))
+            except json.JSONDecodeError:
+                return None
+        elif not page.is_pdf:
+            page.html = content.decode(meta.get("encoding") or "utf-8", errors="replace")
+        return page
+
+    def lookup(self, url: str, tier: str = "http") -> Tuple[Optional[Page], bool, Dict[str, str]]:
+        """
+        Returns (cached page or None, is_fresh, revalidation headers).
+        In offline mode any cached page counts as fresh; a missing one raises CacheMissError.
+        """
+        if not self.enabled or self.mode == "refresh":
+            return None, False, {}
+        meta = self._load(url, tier)
+        page = self._to_page(url, meta) if meta else None
+        if page is None:
+            if self.offline:
+                raise CacheMissError(f"{url} is not in the cache (offline mode)")
+            return None, False, {}
+        fresh = self.offline or (time.time() - meta.get("fetched_at", 0)) < self.ttl
+        validators = {}
+        headers = {k.lower(): v for k, v in page.headers.items()}
+        if "etag" in headers:
+            validators["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            validators["If-Modified-Since"] = headers["last-modified"]
+        return page, fresh, validators
+
+    def pages(self, tiers: Tuple[str, ...] = ("http", "browser")) -> Iterator[Page]:
+        """Every cached page of the given tiers, in no particular order (for offline checks and benchmarks)."""
+        entries_dir = os.path.join(self.cache_dir, "entries")
+        if not os.path.isdir(entries_dir):
+            return
+        for name in sorted(os.listdir(entries_dir)):
+            if not name.endswith(".json") or name[:-5].rsplit("-", 1)[-1] not in tiers:
+                continue
+            try:
+                with open(os.path.join(entries_dir, name), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            page = self._to_page(meta.get("url", ""), meta)
+            if page is not None:
+                yield page
+
+    # --- Write ---
+
+    def store(self, page: Page, encoding: Optional[str] = None):
+        """Saves a freshly fetched page under its tier."""
+        if not self.enabled or not page.content:
+            return
+        digest = hashlib.sha256(page.content).hexdigest()
+        body_path = self._body_path(digest)
+        meta = {
+            "url": page.url,
+            "final_url": page.final_url,
+            "status": page.status,
+            "headers": page.headers,
+            "tier": page.tier,
+            "encoding": encoding or ("utf-8" if page.tier.startswith("browser") else None),
+            "body": digest,
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            if not os.path.exists(body_path):
+                self._write_atomic(body_path, page.content)
+            self._write_atomic(self._entry_path(page.url, page.tier),
+                               json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def touch(self, url: str, tier: str = "http", headers: Optional[dict] = None):
+        """Marks a cached entry fresh again after a 304 Not Modified, merging any updated validators."""
+        meta = self._load(url, tier)
+        if meta is None:
+            return
+        meta["fetched_at"] = time.time()
+        for name, value in (headers or {}).items():
+            if name.lower() in ("etag", "last-modified", "cache-control", "expires"):
+                meta["headers"] = {k: v for k, v in meta["headers"].items() if k.lower() != name.lower()}
+                meta["headers"][name] = value
+        with self._lock:
+            self._write_atomic(self._entry_path(url, tier), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+# --- Shared Cache ---
+_cache: Optional[HttpCache] = None
+
+
+def get_cache() -> HttpCache:
+    """Returns the process-wide cache configured from the FETCH_CACHE_* environment variables."""
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
@@ -0,0 +1,56 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from extract.matcher import KeywordMatcher, get_matcher
+
+# --- Configuration Constants ---
+# Technology -> every name it goes by on company pages. A keyword that names a technology (in any case)
+# is searched for under all of its aliases; any other keyword is searched for as given.
+TECHNOLOGY_ALIASES: Dict[str, List[str]] = {
+    "SAP": [
+        "SAP", "S/4HANA", "SAP Business One", "SAP Business ByDesign",
+        "SAP ERP Central Component", "SAP Customer Experience", "SAP Sales Cloud",
+        "SAP Edge Services", "SAP HANA"
+    ],
+    "VMware": [
+        "VMware", "VMware vSphere", "vSphere", "vCenter", "VMWare ESX",
+        "VMware Horizon", "VMware vSAN", "VMware Infrastructure", "VMware vRealize"
+    ],
+    "AWS": [
+        "AWS", "Amazon Web Services", "Amazon EC2", "Amazon RDS", "Amazon S3",
+        "Amazon IAM", "Amazon EBS", "Amazon Lambda", "Amazon EFS", "Amazon CloudFront"
+    ],
+    "Azure": ["Azure", "Microsoft Azure", "Microsoft Cloud"],
+    "GCP": ["GCP", "Google Cloud Platform", "Google Cloud"],
+    "Alibaba Cloud": ["Alibaba Cloud", "Ali Cloud"],
+    "IBM Cloud": ["IBM Cloud"],
+}
+_TECHNOLOGIES = {technology.lower(): technology for technology in TECHNOLOGY_ALIASES}
+
+
+@lru_cache(maxsize=1024)
+def aliases(keyword: str) -> Tuple[str, ...]:
+    """`keyword` followed by the other aliases of the technology it names, without case-insensitive duplicates."""
+    keyword = keyword.strip()
+    technology = _TECHNOLOGIES.get(keyword.lower())
+    unique = {}
+    for name in [keyword] + (TECHNOLOGY_ALIASES[technology] if technology else []):
+        unique.setdefault(name.lower(), name)
+    return tuple(unique.values())
+
+
+@lru_cache(maxsize=1024)
+def keyword_pattern(keyword: str) -> re.Pattern:
+    """
+    Compiled, case-insensitive whole-word pattern matching any alias of `keyword`.
+    Longer aliases come first so "SAP HANA" wins over "SAP"; any whitespace run matches the space in an alias.
+    """
+    names = sorted(aliases(keyword), key=len, reverse=True)
+    alternatives = "|".join(r"\s+".join(map(re.escape, name.split())) for name in names)
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+
+def keyword_matcher(keyword: str, *extra_terms: str) -> KeywordMatcher:
+    """Shared Aho-Corasick matcher for every alias of `keyword`, plus `extra_terms`."""
+    return get_matcher((*aliases(keyword), *extra_terms))
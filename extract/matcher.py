@@ -0,0 +1,113 @@
+import re
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
+
+# --- Configuration Constants ---
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")  # words, and every punctuation mark as a token of its own
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    start: int  # character offsets into the scanned text
+    end: int
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word and punctuation tokens of `text`."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return TOKEN_PATTERN.findall(lowered)
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]  # lower() changed the length, e.g. "İ"
+
+
+def token_spans(text: str) -> List[Tuple[int, int]]:
+    """Character span of each token returned by tokenize(text)."""
+    lowered = text.lower()
+    return [match.span() for match in TOKEN_PATTERN.finditer(lowered if len(lowered) == len(text) else text)]
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over word tokens: finds every occurrence of every keyword in one pass.
+    Matching is case-insensitive and on whole words ("use" does not match "user", "SAP" does not match
+    "SAPIENT"); runs of whitespace between the words of a keyword count as one space.
+    Build it once per keyword set with get_matcher(); it is read-only afterwards and safe to share.
+
+        matcher = get_matcher(["AWS", "Amazon Web Services"])
+        matcher.found(text)          # {"AWS", "Amazon Web Services"}
+        for match in matcher.finditer(text): ...
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword and keyword.strip()))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, int]]] = [[]]  # (keyword, length in tokens) ending at each state
+        for keyword in self.keywords:
+            tokens = tokenize(keyword)
+            state = 0
+            for token in tokens:
+                if token not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][token] = len(self._goto) - 1
+                state = self._goto[state][token]
+            self._out[state].append((keyword, len(tokens)))
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def scan(self, tokens: List[str]) -> Iterator[Tuple[str, int, int]]:
+        """(keyword, first token index, last token index) for every occurrence, in order of where it ends."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for keyword, length in out[state]:
+                yield keyword, index - length + 1, index
+
+    def finditer(self, text: str) -> Iterator[KeywordMatch]:
+        """Every occurrence of every keyword with its character offsets, including overlapping ones."""
+        spans = None
+        for keyword, first, last in self.scan(tokenize(text)):
+            if spans is None:
+                spans = token_spans(text)
+            yield KeywordMatch(keyword, spans[first][0], spans[last][1])
+
+    def found(self, text: str) -> Set[str]:
+        """The keywords that occur in `text` at least once."""
+        return {keyword for keyword, _, _ in self.scan(tokenize(text))}
+
+    def search(self, text: str) -> bool:
+        """True as soon as any keyword occurs in `text`."""
+        return next(self.scan(tokenize(text)), None) is not None
+
+
+def sentence_hits(matcher: KeywordMatcher, text: str, sentence_starts: List[int]) -> Set[int]:
+    """Indices of the sentences (given by their start offsets in `text`, ascending) that contain a keyword."""
+    return {bisect_right(sentence_starts, match.start) - 1 for match in matcher.finditer(text)}
+
+
+@lru_cache(maxsize=256)
+def _cached_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def get_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Shared matcher for a keyword set; the automaton is built the first time the set is seen."""
+    return _cached_matcher(tuple(keywords))
@@ -0,0 +1,56 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import spacy
+from spacy.language import Language
+
+# --- Configuration Constants ---
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+# How sentence boundaries are found when only doc.sents is needed:
+#   "senter"      - the model's small statistical sentence recogniser, tagger/parser/NER not loaded (default)
+#   "sentencizer" - rule-based punctuation splitting on a blank pipeline, no model needed (fastest)
+#   "parser"      - the full pipeline, sentences from the dependency parse (the old behaviour)
+SENTENCE_MODE = os.environ.get("SENTENCE_MODE", "senter").lower()
+SENTENCE_ONLY_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+SENTENCE_MAX_LENGTH = 5_000_000  # without parser/NER a long page costs little memory
+
+_pipelines: Dict[Tuple[str, str], Language] = {}
+_lock = threading.Lock()
+
+
+def _build(model: str, mode: str) -> Language:
+    if mode == "parser":
+        return spacy.load(model)
+    if mode == "senter":
+        try:
+            nlp = spacy.load(model, exclude=SENTENCE_ONLY_EXCLUDE)
+        except OSError as e:
+            print(f"  [WARNING] spaCy model {model!r} not available ({e}); using the rule-based sentencizer.")
+            return _build(model, "sentencizer")
+        if "senter" in nlp.disabled:
+            nlp.enable_pipe("senter")
+        elif "senter" not in nlp.pipe_names:
+            nlp.add_pipe("sentencizer")
+    else:
+        nlp = spacy.blank(model.split("_", 1)[0] if "_" in model else "en")
+        nlp.add_pipe("sentencizer")
+    nlp.max_length = SENTENCE_MAX_LENGTH
+    return nlp
+
+
+def load_pipeline(model: str = SPACY_MODEL, mode: str = "parser") -> Language:
+    """The spaCy pipeline for (`model`, `mode`), loaded once per process and shared by every caller."""
+    key = (model, mode)
+    if key not in _pipelines:
+        with _lock:
+            if key not in _pipelines:
+                _pipelines[key] = _build(model, mode)
+                print(f"|   [nlp] loaded {model} ({mode}): {', '.join(_pipelines[key].pipe_names)}")
+    return _pipelines[key]
+
+
+def sentence_pipeline(model: str = SPACY_MODEL, mode: str = SENTENCE_MODE) -> Language:
+    """Shared pipeline configured only for sentence segmentation (see SENTENCE_MODE)."""
+    return load_pipeline(model, mode)
+
@@ -1,13 +1,76 @@
+import os
 import re
 from bs4 import BeautifulSoup
-import time
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+from extract.driver_pool import get_pool, chromedriver_path
+from extract.document import Document
+from extract.context import context_around_keyword
+from extract.page import Page, TEXT_TIER, DATE_HINT_SELECTORS
+from extract.http_cache import get_cache, CacheMissError
+from extract.rate_limit import limiter
+from extract.host_health import host_health
+
+# --- Configuration Constants ---
+LEAN_RENDER = os.environ.get("LEAN_RENDER", "1") != "0"  # block heavy resources, eager page loads
+BROWSER_EXTRACT = os.environ.get("BROWSER_EXTRACT", "1") != "0"  # return text + date signals instead of page_source
+PAGE_LOAD_TIMEOUT = 20
+READY_TIMEOUT = 8     # cap on waiting for the content-ready signal after the DOM is parsed
+DOM_QUIET_MS = 500    # the page counts as settled once the DOM has not changed for this long
+BLOCKED_RESOURCE_PATTERNS = [
+    # images, fonts and media
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg", "*.avi", "*.mov", "*.m3u8",
+    # analytics, ads and tag managers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*connect.facebook.net*", "*hotjar.com*", "*clarity.ms*", "*segment.com*", "*optimizely.com*",
+    "*linkedin.com/px*", "*snap.licdn.com*", "*bat.bing.com*", "*adservice.google.com*",
+]
+
+# Installed once per document: remembers when the DOM last changed
+DOM_OBSERVER_JS = """
+if (!window.__lastMutation) {
+    window.__lastMutation = Date.now();
+    new MutationObserver(() => { window.__lastMutation = Date.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+}
+"""
+# Ready when the keyword is already on the page, or when parsing is done and the DOM has gone quiet.
+# A navigation (e.g. a JS redirect) drops the observer; it is installed again and the quiet period restarts.
+CONTENT_READY_JS = DOM_OBSERVER_JS + """
+const keyword = arguments[0], quietMs = arguments[1];
+if (!document.body) return false;
+if (keyword && document.body.textContent.toLowerCase().includes(keyword)) return true;
+return document.readyState !== 'loading' && Date.now() - window.__lastMutation >= quietMs;
+"""
+# Runs in the page once rendering is done. Collects what date_me_3 needs, then strips the same tags as
+# clean_html() from the live DOM and returns the remaining innerText, so no HTML crosses the wire.
+EXTRACT_JS = """
+const hintSelectors = arguments[0];
+const jsonLd = Array.from(document.querySelectorAll('script[type="application/ld+json"]'), s => s.textContent);
+const meta = {};
+for (const tag of document.querySelectorAll('meta[content]')) {
+    const key = tag.getAttribute('name') || tag.getAttribute('property') || tag.getAttribute('itemprop');
+    if (key && !(key in meta)) meta[key] = tag.getAttribute('content');
+}
+const dateHints = [];
+for (const selector of hintSelectors) {
+    for (const el of document.querySelectorAll(selector)) {
+        dateHints.push(el.textContent || el.getAttribute('datetime') || '');
+        if (dateHints.length >= 200) break;
+    }
+}
+const body = document.body;
+const bodyText = body ? body.innerText : '';
+for (const el of document.querySelectorAll('script, style, nav, footer, aside, header')) el.remove();
+return {text: body ? body.innerText : '', json_ld: jsonLd, meta: meta, date_hints: dateHints, body_text: bodyText};
+"""
 
 
 def create_driver() -> webdriver.Chrome:
@@ -17,80 +80,110 @@ def create_driver() -> webdriver.Chrome:
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36")
-    
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    if LEAN_RENDER:
+        # Return from driver.get() at DOMContentLoaded and never download images
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+    if LEAN_RENDER:
+        _block_heavy_resources(driver)
     return driver
 
 
-def fetch_html(url: str) -> str:
-    """
-    Fetches HTML content from a URL using a pre-initialized headless browser.
-    Includes a simplified retry mechanism.
-    """
+def _block_heavy_resources(driver: webdriver.Chrome):
+    """Blocks fonts, media and trackers for every page this driver loads (kept across pool resets)."""
     try:
-        # First attempt
-        driver = create_driver()
-        driver.set_page_load_timeout(20)
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(2)
-        return driver.page_source
-    except Exception as e:
-        print(f"|   [!] Initial request failed for {url}. Retrying...")
-        time.sleep(5)
-        # Second attempt
-        driver.set_page_load_timeout(30) # Longer timeout for retry
-        driver.get(url)
-        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(3)
-        return driver.page_source
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+    except WebDriverException as e:
+        print(f"  [WARNING] Could not enable resource blocking: {e.msg}")
 
 
-# --------------
-
-def clean_html(html: str) -> str:
-    """Removes unwanted tags and extra whitespace from HTML."""
-    soup = BeautifulSoup(html, "lxml")
-    # Added <header> to the list of common non-content tags to remove
-    for tag in soup(["script", "style", "nav", "footer", "aside", "header"]):
-        tag.decompose()
-    text = soup.get_text(separator=" ")
-    return re.sub(r"\s+", " ", text).strip()
+def wait_until_ready(driver: webdriver.Chrome, keyword: str = None, timeout: float = READY_TIMEOUT):
+    """
+    Waits until the page shows `keyword` or its DOM stops changing for DOM_QUIET_MS, at most `timeout` seconds.
+    Replaces the fixed post-load sleep: static pages return almost at once, busy ones get the full cap.
+    """
+    keyword = keyword.lower() if keyword else None
+    try:
+        driver.execute_script(DOM_OBSERVER_JS)
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            lambda d: d.execute_script(CONTENT_READY_JS, keyword, DOM_QUIET_MS))
+    except TimeoutException:
+        pass  # render what is there after the cap
 
 
-def context_around_keyword(text: str, keyword: str, context_words: int = 250, max_matches: int = 5) -> list:
+def render_page(url: str, keyword: str = None, extract: bool = BROWSER_EXTRACT) -> Page:
+    """
+    Renders a URL using a warm headless browser from the shared driver pool and returns it as a Page.
+    Rendered pages are kept in the on-disk cache. `keyword` lets the render finish as soon as it appears.
+    With `extract`, the page comes back as text and date signals (tier TEXT_TIER) instead of HTML.
+    """
+    cache = get_cache()
+    tiers = [TEXT_TIER, "browser"] if extract else ["browser"]
+    if cache.offline:
+        tiers.append("http")  # a plain HTTP copy is better than nothing
+    for tier in tiers:
+        try:
+            cached, fresh, _ = cache.lookup(url, tier)
+        except CacheMissError:
+            if tier == tiers[-1]:
+                raise
+            continue
+        if cached is not None and fresh:
+            return cached
+
+    page = _render(url, keyword, extract)
+    cache.store(page)
+    return page
+
+
+def _render(url: str, keyword: str = None, extract: bool = BROWSER_EXTRACT) -> Page:
     """
-    Finds up to `max_matches` occurrences of a keyword and returns the surrounding context.
+    Drives the browser for one URL. Failures are raised, not slept on: callers retry through
+    extract.retry.RetryScheduler (crashed browsers have already been replaced by the pool).
     """
-    words = re.findall(r'\b\w+\b', text)
-    pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+    host_health.check(url)
+    pool = get_pool(create_driver)
+    limiter.acquire(url)
+    with host_health.observe(url), pool.driver() as driver:
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        driver.get(url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        wait_until_ready(driver, keyword)
+        if extract:
+            return Page.from_extract(url, driver.current_url, driver.execute_script(EXTRACT_JS, DATE_HINT_SELECTORS))
+        html = driver.page_source
+        return Page(url=url, final_url=driver.current_url, content=html.encode("utf-8"), html=html, tier="browser")
 
-    matches = []
-    for match in pattern.finditer(text):
-        if len(matches) >= max_matches:
-            break
 
-        idx = match.start()
-        word_idx = len(re.findall(r'\b\w+\b', text[:idx]))
-        start = max(0, word_idx - context_words)
-        end = min(len(words), word_idx + context_words)
-        context = " ".join(words[start:end])
-        matches.append({
-            "keyword": keyword,
-            "context": context
-        })
+def fetch_html(url: str) -> str:
+    """Fetches the rendered HTML of a URL."""
+    return render_page(url, extract=False).html
+
 
-    return matches
+# --------------
+
+def clean_html(html: str) -> str:
+    """Removes unwanted tags (script, style, nav, footer, aside, header) and extra whitespace from HTML."""
+    return Document.of(html).clean_text()
 
 
-def normal(url: str, keyword: str) -> list:
+def normal(url: str, keyword: str, page: Page = None) -> list:
     """
-    Main function to fetch, clean, and extract keyword contexts from a URL using a provided driver.
+    Main function to fetch, clean, and extract keyword contexts from a URL.
+    Pass an already fetched `page` to reuse it instead of rendering the URL again.
     """
-    html = fetch_html(url)
-    if not html:
+    if page is None:
+        page = render_page(url, keyword)
+    if page.text is not None:
+        text = re.sub(r"\s+", " ", page.text).strip()  # already cleaned inside the browser
+    elif page.html:
+        text = page.document.content_text(keyword)  # main content only, boilerplate left behind
+    else:
         return []
-    text = clean_html(html)
     contexts = context_around_keyword(text, keyword)
 
     return contexts
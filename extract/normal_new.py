@@ -1,14 +1,20 @@
 # C:/Users/propl/PycharmProjects/rook_dont/extract/normal_new.py
 
-import re
 import requests
-from bs4 import BeautifulSoup
 import json
 import os
 from datetime import datetime
+from extract.rate_limit import limiter
+from extract.document import Document
+from extract.keywords import keyword_pattern
 
 # --- Define a constant path for the single log file ---
 LOG_FILE_PATH = "normal_results/context_extraction_log.json"
+NOISE_SELECTORS = (
+    "nav", "footer", "aside", "header", "script", "style",
+    "[role='navigation']", "[role='banner']", "[role='contentinfo']",
+    "#sidebar", ".sidebar", "#footer", ".footer", "#header", ".header"
+)
 
 
 def _save_result_to_json(url: str, keyword: str, contexts: list):
@@ -49,6 +55,7 @@ def fetch_html(url: str) -> str:
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
     }
     # Added verify=False to handle sites with SSL certificate issues, a common problem.
+    limiter.acquire(url)
     response = requests.get(url, headers=headers, timeout=20, verify=False)
     response.raise_for_status()
     return response.text
@@ -59,43 +66,25 @@ def extract_semantic_contexts(html: str, keyword: str, max_matches: int = 6) ->
     UPGRADED LOGIC: An intelligent context extractor that finds all keyword matches
     within distinct blocks and then selects a diverse, spaced-out sample.
     """
-    soup = BeautifulSoup(html, "lxml")
+    # 1. Aggressive cleaning of irrelevant sections: everything under NOISE_SELECTORS is skipped
+    document = Document.of(html)
 
-    # 1. Aggressive cleaning of irrelevant sections
-    for selector in [
-        "nav", "footer", "aside", "header", "script", "style",
-        "[role='navigation']", "[role='banner']", "[role='contentinfo']",
-        "#sidebar", ".sidebar", "#footer", ".footer", "#header", ".header"
-    ]:
-        for tag in soup.select(selector):
-            tag.decompose()
-
-    # The \b ensures we only match whole words, preventing partial matches.
-    keyword_pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+    # Whole-word match on the keyword or any of its aliases, preventing partial matches.
+    pattern = keyword_pattern(keyword)
 
     # --- Step 1: Find all potential contexts first ---
     all_potential_contexts = []
     seen_contexts_text = set()
 
-    # --- Fallback Search Logic (Request 1) ---
-    # Prioritize major semantic tags, but fall back to the whole body if they don't exist.
-    content_area = soup.select_one("main, article")
-    if not content_area:
-        print("  [INFO] No <main> or <article> tag found. Falling back to full <body> search.")
-        content_area = soup.body
-
-    if not content_area:
-        return []  # Should be rare, but a good safeguard
-
-    # Iterate through all relevant blocks to find every possible match
-    for block in content_area.find_all(['p', 'div', 'li', 'section'], recursive=True):
+    # Main-content blocks found in one pass by text/link density; the whole page when the keyword is
+    # only mentioned outside the main content
+    for block_text in document.content_blocks(keyword, drop=NOISE_SELECTORS):
         # Ignore small, likely irrelevant blocks
-        if not block.get_text(strip=True) or len(block.get_text(strip=True)) < 50:
+        if len(block_text) < 50:
             continue
 
-        block_text = block.get_text(separator=' ', strip=True)
-        if keyword_pattern.search(block_text):
-            cleaned_context = re.sub(r'\s+', ' ', block_text).strip()
+        if pattern.search(block_text):
+            cleaned_context = block_text  # already whitespace-collapsed
             # De-duplicate to ensure we only have unique context snippets
             if cleaned_context not in seen_contexts_text:
                 all_potential_contexts.append({"keyword": keyword, "context": cleaned_context})
@@ -0,0 +1,105 @@
+import json
+import requests
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# --- Configuration Constants ---
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
+REQUEST_TIMEOUT = 45
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,application/pdf,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+TEXT_TIER = "browser_text"  # rendered and reduced to text + date signals inside the browser
+# Elements whose text is likely to hold a publication date, in order of trust (used by date_me_3)
+DATE_HINT_SELECTORS = [
+    'time[datetime]', '[class*="date"]', '[class*="publish"]',
+    '[class*="timestamp"]', '[id*="date"]', '[id*="publish"]'
+]
+
+
+@dataclass
+class Page:
+    """
+    Everything fetched for one URL. Built once per row and handed to every extractor
+    (normal, date_me, pdf) so none of them needs to download the page again.
+    """
+    url: str
+    final_url: str
+    status: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    html: Optional[str] = None  # decoded body, or the rendered DOM when tier == "browser"
+    tier: str = "http"
+    # Only for tier == TEXT_TIER, where no HTML is kept:
+    text: Optional[str] = None  # visible text with nav/header/footer/aside/script/style removed
+    date_signals: Dict[str, Any] = field(default_factory=dict)  # json_ld, meta, date_hints, body_text
+    _document: Any = field(default=None, repr=False, compare=False)
+
+    @property
+    def document(self):
+        """The page's HTML parsed once (extract.document.Document) and shared by every extractor."""
+        if self._document is None:
+            from extract.document import Document
+            self._document = Document(self.html or "")
+        return self._document
+
+    @classmethod
+    def from_extract(cls, url: str, final_url: str, extract: Dict[str, Any]) -> "Page":
+        """Builds a TEXT_TIER page from the browser extraction result; `content` holds it as JSON for the cache."""
+        page = cls(url=url, final_url=final_url, tier=TEXT_TIER,
+                   content=json.dumps(extract, ensure_ascii=False).encode("utf-8"))
+        page.text = extract.get("text", "")
+        page.date_signals = {k: v for k, v in extract.items() if k != "text"}
+        return page
+
+    @property
+    def content_type(self) -> str:
+        for key, value in self.headers.items():
+            if key.lower() == "content-type":
+                return value.lower()
+        return ""
+
+    @property
+    def is_pdf(self) -> bool:
+        return "application/pdf" in self.content_type or self.content[:5] == b"%PDF-"
+
+
+def fetch_page(url: str, headers: Optional[dict] = None, timeout: int = REQUEST_TIMEOUT) -> Page:
+    """
+    Downloads a URL once with a plain HTTP GET and returns it as a Page.
+    Fresh copies are served from the on-disk cache; stale ones are revalidated with ETag/Last-Modified.
+    Raises requests.RequestException on network errors and 4xx/5xx responses, and
+    extract.host_health.CircuitOpenError (or HostNotFoundError, for names that don't resolve) without a
+    request when the host is known to be down.
+    """
+    from extract.http_cache import get_cache
+    from extract.rate_limit import limiter
+    from extract.host_health import host_health
+    cache = get_cache()
+    cached, fresh, validators = cache.lookup(url, "http")
+    if cached is not None and fresh:
+        return cached
+
+    host_health.check(url)
+    limiter.acquire(url)
+    with host_health.observe(url):
+        response = requests.get(url, headers={**(headers or DEFAULT_HEADERS), **validators}, timeout=timeout)
+        if cached is not None and response.status_code == 304:
+            cache.touch(url, "http", dict(response.headers))
+            return cached
+        response.raise_for_status()
+    page = Page(
+        url=url,
+        final_url=response.url,
+        status=response.status_code,
+        headers=dict(response.headers),
+        content=response.content,
+    )
+    if not page.is_pdf:
+        page.html = response.text
+    cache.store(page, encoding=response.encoding or response.apparent_encoding)
+    return page
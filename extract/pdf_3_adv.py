@@ -5,12 +5,28 @@ import re
 from io import BytesIO
 from datetime import datetime
 from datefinder import find_dates
+from extract.page import Page, fetch_page
+from extract.host_health import CircuitOpenError, HostNotFoundError
+from extract.pdf_range import read_pdf_info
+from extract.keywords import keyword_pattern
 
 USER_AGENT = 'Chrome/108.0.0.0'
 REQUEST_TIMEOUT = 45
+PDF_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'application/pdf,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+
+def fetch_pdf(url: str) -> Page:
+    """Downloads a PDF once so both content and date extraction can share it."""
+    return fetch_page(url, headers=PDF_HEADERS, timeout=REQUEST_TIMEOUT)
 
 # pdf_content ==============================================================
-def pdf_content(url: str, keyword: str, max_per_page=2, max_total=4) -> list:
+def pdf_content(url: str, keyword: str, max_per_page=2, max_total=4, page: Page = None) -> list:
 
     def clean_text(txt: str) -> str:
         txt = re.sub(r"[\n\r\t]", " ", txt)
@@ -25,49 +41,28 @@ def pdf_content(url: str, keyword: str, max_per_page=2, max_total=4) -> list:
     # char = 200
     #shutdown
     try:
-        headers = {
-            'User-Agent': USER_AGENT,
-            'Accept': 'application/pdf,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        doc = fitz.open(stream=BytesIO(response.content), filetype="pdf")
-
-        for page_num, page in enumerate(doc):
+        if page is None:
+            page = fetch_pdf(url)
+        doc = fitz.open(stream=BytesIO(page.content), filetype="pdf")
+        pattern = keyword_pattern(keyword)
+
+        for pdf_page in doc:
             if total_found >= max_total:
                 break
 
-            text = page.get_text()
-            text_lower = text.lower()
-            keyword_lower = keyword.lower()
-            # print(f"Text Content of pdf: {text_lower} and keyword locating in the file: {keyword_lower}")
-
-            if keyword_lower in text_lower:
-                start_idx = 0
-                count_this_page = 0
-
-                while total_found < max_total and count_this_page < max_per_page:
-                    idx = text_lower.find(keyword_lower, start_idx)
-                    if idx == -1:
-                        break
-                    start = max(0, idx - 200)
-                    # start = max(0, idx - char)
-                    end = min(len(text), idx + len(keyword) + 300)
-                    # end = min(len(text), idx + len(keyword) + char)
-                    snippet = text[start:end]
-                    text = clean_text(snippet)
-                    # results.append(f"keyword: {keyword}, context: {text}")
-                    results.append({
-                        "keyword": keyword,
-                        "context": text
-                    })
-                    total_found += 1
-                    count_this_page += 1
-                    start_idx = idx + len(keyword)
-
+            text = pdf_page.get_text()
+            count_this_page = 0
+            for match in pattern.finditer(text):
+                if total_found >= max_total or count_this_page >= max_per_page:
+                    break
+                start = max(0, match.start() - 200)
+                end = min(len(text), match.end() + 300)
+                results.append({
+                    "keyword": keyword,
+                    "context": clean_text(text[start:end])
+                })
+                total_found += 1
+                count_this_page += 1
 
         return results
 
@@ -127,34 +122,62 @@ def _find_date_in_metadata (doc: fitz.Document) -> str | None:
         return f"{m}/{y}"
     except Exception as e:
         return None
+
+def _find_date_in_remote_metadata(url: str) -> str | None:
+    """
+    DATE STEP 2 (date-only rows): Reads modDate (or creationDate) with a few byte-range requests instead of
+    downloading the file. Returns "" when the metadata holds no date, None when it can't be read this way.
+    """
+    metadata = read_pdf_info(url, headers=PDF_HEADERS)
+    if metadata is None:
+        return None
+    for key in ("modDate", "creationDate"):
+        match = re.match(r"D:(\d{4})(\d{2})", metadata.get(key, ""))
+        if match:
+            return f"{match.group(2)}/{match.group(1)}"
+    return ""
 # ==============================================================================
 
 # pdf_date function returns date
-def pdf_date(url: str) -> tuple[str, str]:
+def pdf_date(url: str, page: Page = None) -> str:
     """
-    Orchestrates the entire PDF processing pipeline: content and date extraction.
+    Finds the date of a PDF from its URL, first pages or metadata.
+    Pass an already fetched `page` to reuse it. Without one (date-only rows), the date comes from the URL
+    or the metadata read over HTTP byte ranges, and the file is only downloaded (and its first pages
+    searched) when the server does not honour Range requests.
     """
     date = _find_date_in_url(url)
+    if date:
+        return date
     try:
-        response = requests.get(url, timeout=REQUEST_TIMEOUT, headers={'User-Agent': USER_AGENT})
-        response.raise_for_status()
-
-        with fitz.open(stream=BytesIO(response.content), filetype="pdf") as doc:
+        if page is None:
+            date = _find_date_in_remote_metadata(url)
+            if date is not None:
+                return date or "Not found"
+            page = fetch_pdf(url)
+
+        with fitz.open(stream=BytesIO(page.content), filetype="pdf") as doc:
+            date = _find_date_in_pages(doc)
             if not date:
-                date = _find_date_in_pages(doc)
-                if not date:
-                    date = _find_date_in_metadata(doc)
+                date = _find_date_in_metadata(doc)
 
         return date or "Not found"
 
-    except (requests.RequestException, fitz.fitz.FitzError, ValueError) as e:
+    except (requests.RequestException, CircuitOpenError, HostNotFoundError, fitz.fitz.FitzError, ValueError) as e:
         print(f"  [PDF Processing Error] Could not process {url}. Reason: {e}")
         return date or "Not found"
 # ==============================================================================
 
-def pdf(url,keyword):
-    contexts = pdf_content(url,keyword)
-    date = pdf_date(url)
+def pdf(url, keyword, page: Page = None):
+    """Extracts keyword contexts and the date from a PDF, downloading it at most once."""
+    if page is None:
+        try:
+            page = fetch_pdf(url)
+        except requests.RequestException as e:
+            print(f"  [PDF Processing Error] Could not download {url}. Reason: {e}")
+            return [{"error": str(e)}], _find_date_in_url(url) or "Not found"
+    contexts = pdf_content(url, keyword, page=page)
+    date = pdf_date(url, page=page)
     return contexts, date
 
 '''
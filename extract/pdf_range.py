@@ -0,0 +1,345 @@
+import re
+import zlib
+import requests
+from typing import Dict, Optional, Tuple
+from extract.rate_limit import limiter
+from extract.host_health import host_health
+
+# --- Configuration Constants ---
+USER_AGENT = 'Chrome/108.0.0.0'
+REQUEST_TIMEOUT = 20
+TAIL_BYTES = 8 * 1024        # enough for the trailer and startxref of almost every PDF
+CHUNK_BYTES = 8 * 1024       # minimum size of each range request
+MAX_RANGE_REQUESTS = 12      # give up (and let the caller download the file) past this
+MAX_XREF_SECTIONS = 8        # incremental updates followed through /Prev
+
+
+class RangeNotSupported(Exception):
+    """The server ignored the Range header, or the PDF layout needs more than a few small reads."""
+
+
+class RangeReader:
+    """Reads arbitrary byte ranges of a remote file with HTTP Range requests, caching every chunk."""
+
+    def __init__(self, url: str, headers: Optional[dict] = None, timeout: int = REQUEST_TIMEOUT):
+        self.url = url
+        self.headers = {'User-Agent': USER_AGENT, **(headers or {}), 'Accept-Encoding': 'identity'}
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.size: Optional[int] = None
+        self.requests_made = 0
+        self.bytes_read = 0
+        self._chunks: Dict[int, bytes] = {}
+
+    def _get(self, byte_range: str) -> Tuple[requests.Response, bytes]:
+        if self.requests_made >= MAX_RANGE_REQUESTS:
+            raise RangeNotSupported(f"more than {MAX_RANGE_REQUESTS} range requests needed")
+        host_health.check(self.url)
+        limiter.acquire(self.url)
+        with host_health.observe(self.url):
+            response = self.session.get(self.url, headers={**self.headers, 'Range': byte_range},
+                                        timeout=self.timeout, stream=True)
+        self.requests_made += 1
+        if response.status_code != 206:
+            response.close()  # never pull a full body through this path
+            response.raise_for_status()
+            raise RangeNotSupported(f"server answered {response.status_code} to a Range request")
+        data = response.content
+        self.bytes_read += len(data)
+        return response, data
+
+    def tail(self, length: int = TAIL_BYTES) -> Tuple[int, bytes]:
+        """Returns (offset, bytes) of the last `length` bytes and learns the file size."""
+        response, data = self._get(f"bytes=-{length}")
+        match = re.match(r"bytes (\d+)-(\d+)/(\d+)", response.headers.get("Content-Range", ""))
+        if not match:
+            raise RangeNotSupported("missing Content-Range header")
+        start, self.size = int(match.group(1)), int(match.group(3))
+        self._chunks[start] = data
+        return start, data
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Returns up to `length` bytes at `offset`, from an earlier chunk when possible."""
+        for start, data in self._chunks.items():
+            if start <= offset and offset + length <= start + len(data):
+                return data[offset - start:offset - start + length]
+        end = offset + max(length, CHUNK_BYTES) - 1
+        if self.size is not None:
+            end = min(end, self.size - 1)
+        _, data = self._get(f"bytes={offset}-{end}")
+        self._chunks[offset] = data
+        return data[:length]
+
+
+# --- PDF Syntax Helpers ---
+
+def _extract_dict(data: bytes) -> Tuple[bytes, int]:
+    """Returns the first balanced << ... >> dictionary in `data` and the index just after it."""
+    start = data.find(b"<<")
+    if start == -1:
+        raise ValueError("no dictionary found")
+    depth, i = 0, start
+    while i < len(data) - 1:
+        pair = data[i:i + 2]
+        if pair == b"<<":
+            depth += 1
+            i += 2
+        elif pair == b">>":
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return data[start:i], i
+        elif data[i:i + 1] == b"(":
+            # skip literal strings, which may contain unbalanced angle brackets
+            level, i = 1, i + 1
+            while i < len(data) and level:
+                ch = data[i:i + 1]
+                if ch == b"\\":
+                    i += 1
+                elif ch == b"(":
+                    level += 1
+                elif ch == b")":
+                    level -= 1
+                i += 1
+        else:
+            i += 1
+    raise ValueError("unterminated dictionary")
+
+
+def _int(d: bytes, key: bytes) -> Optional[int]:
+    match = re.search(rb"/" + key + rb"\s+(\d+)\b(?!\s+\d+\s+R)", d)
+    return int(match.group(1)) if match else None
+
+
+def _ref(d: bytes, key: bytes) -> Optional[int]:
+    match = re.search(rb"/" + key + rb"\s+(\d+)\s+\d+\s+R", d)
+    return int(match.group(1)) if match else None
+
+
+def _ints(d: bytes, key: bytes) -> Optional[list]:
+    match = re.search(rb"/" + key + rb"\s*\[([^\]]*)\]", d)
+    return [int(x) for x in match.group(1).split()] if match else None
+
+
+def _unpredict(data: bytes, columns: int) -> bytes:
+    """Reverses the PNG row predictors (Predictor >= 10) used by xref and object streams."""
+    out, prev = bytearray(), bytearray(columns)
+    row_len = columns + 1
+    for r in range(0, len(data) - row_len + 1, row_len):
+        ftype, row = data[r], bytearray(data[r + 1:r + row_len])
+        for i in range(columns):
+            left = row[i - 1] if i else 0
+            up, up_left = prev[i], (prev[i - 1] if i else 0)
+            if ftype == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif ftype == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif ftype == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif ftype == 4:
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                predictor = left if pa <= pb and pa <= pc else (up if pb <= pc else up_left)
+                row[i] = (row[i] + predictor) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+def _decode_pdf_string(raw: bytes) -> str:
+    """Decodes a PDF literal (...) or hex <...> string, honouring a UTF-16 byte order mark."""
+    if raw.startswith(b"<"):
+        data = bytes.fromhex(re.sub(rb"\s", b"", raw[1:-1]).decode("ascii"))
+    else:
+        body, data, i = raw[1:-1], bytearray(), 0
+        escapes = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+        while i < len(body):
+            ch = body[i:i + 1]
+            if ch == b"\\" and i + 1 < len(body):
+                nxt = body[i + 1:i + 2]
+                octal = re.match(rb"[0-7]{1,3}", body[i + 1:i + 4])
+                if octal:
+                    data.append(int(octal.group(0), 8) & 0xFF)
+                    i += 1 + len(octal.group(0))
+                    continue
+                data += escapes.get(nxt, nxt)
+                i += 2
+                continue
+            data += ch
+            i += 1
+        data = bytes(data)
+    if data.startswith(b"\xfe\xff"):
+        return data[2:].decode("utf-16-be", errors="replace")
+    return data.decode("latin-1")
+
+
+# --- PDF Structure ---
+
+class RemotePdf:
+    """Just enough of a PDF parser to follow startxref -> xref -> trailer -> /Info over byte ranges."""
+
+    def __init__(self, reader: RangeReader):
+        self.reader = reader
+        self.startxref: Optional[int] = None
+        self.trailer: bytes = b""
+
+    def open(self):
+        offset, tail = self.reader.tail()
+        matches = list(re.finditer(rb"startxref\s+(\d+)", tail))
+        if not matches:
+            raise ValueError("startxref not found in the last bytes of the file")
+        self.startxref = int(matches[-1].group(1))
+        trailer_at = tail.rfind(b"trailer", 0, matches[-1].start())
+        previous_eof = tail.rfind(b"%%EOF", 0, matches[-1].start())
+        if trailer_at > previous_eof:  # a trailer from an earlier revision would be stale
+            self.trailer, _ = _extract_dict(tail[trailer_at:])
+        else:
+            self.trailer = self._read_section(self.startxref, None)[1]
+        if b"/Encrypt" in self.trailer:
+            raise ValueError("encrypted PDF; metadata strings cannot be read without decryption")
+        return self
+
+    def _read_stream_object(self, offset: int) -> Tuple[bytes, bytes]:
+        """Returns (dictionary, decoded stream data) of the stream object starting at `offset`."""
+        data = self.reader.read(offset, CHUNK_BYTES)
+        header = re.match(rb"\s*\d+\s+\d+\s+obj\s*", data)
+        if not header:
+            raise ValueError(f"no object at offset {offset}")
+        d, end = _extract_dict(data[header.end():])
+        end += header.end()
+        stream = re.compile(rb"\s*stream\r?\n").match(data, end)
+        if not stream:
+            raise ValueError("stream keyword not found")
+        length = _int(d, b"Length")
+        if length is not None:
+            if stream.end() + length > len(data):
+                data = self.reader.read(offset, stream.end() + length)
+            raw = data[stream.end():stream.end() + length]
+        else:
+            stop = data.find(b"endstream", stream.end())
+            while stop == -1:
+                data = self.reader.read(offset, len(data) * 2)
+                stop = data.find(b"endstream", stream.end())
+            raw = data[stream.end():stop].rstrip(b"\r\n")
+        if b"/FlateDecode" in d:
+            raw = zlib.decompress(raw)
+        predictor = _int(d, b"Predictor")
+        if predictor and predictor >= 10:
+            raw = _unpredict(raw, _int(d, b"Columns") or 1)
+        return d, raw
+
+    def _read_section(self, offset: int, objnum: Optional[int]) -> Tuple[Optional[tuple], bytes]:
+        """
+        Looks `objnum` up in the xref section at `offset`.
+        Returns (entry or None, trailer dict); entries are ("offset", n) or ("objstm", stream_num, index).
+        """
+        head = self.reader.read(offset, 32)
+        if head.lstrip().startswith(b"xref"):
+            return self._read_classic_section(offset + head.index(b"xref") + 4, objnum)
+        d, data = self._read_stream_object(offset)
+        widths = _ints(d, b"W")
+        index = _ints(d, b"Index") or [0, _int(d, b"Size") or 0]
+        entry = None
+        if objnum is not None and widths:
+            row_len, base = sum(widths), 0
+            for start, count in zip(index[0::2], index[1::2]):
+                if start <= objnum < start + count:
+                    row = data[(base + objnum - start) * row_len:(base + objnum - start + 1) * row_len]
+                    fields, pos = [], 0
+                    for w in widths:
+                        fields.append(int.from_bytes(row[pos:pos + w], "big") if w else None)
+                        pos += w
+                    ftype = 1 if fields[0] is None else fields[0]
+                    if ftype == 1:
+                        entry = ("offset", fields[1])
+                    elif ftype == 2:
+                        entry = ("objstm", fields[1], fields[2])
+                    else:
+                        entry = ("free",)
+                    break
+                base += count
+        return entry, d
+
+    def _read_classic_section(self, pos: int, objnum: Optional[int]) -> Tuple[Optional[tuple], bytes]:
+        entry = None
+        while True:
+            chunk = self.reader.read(pos, 64)
+            sub = re.match(rb"\s*(\d+)\s+(\d+)[ \t]*(?:\r\n|\r|\n)", chunk)
+            if not sub:
+                if not re.match(rb"\s*trailer", chunk):
+                    raise ValueError("malformed xref table")
+                trailer, _ = _extract_dict(self.reader.read(pos, 4096))
+                return entry, trailer
+            start, count = int(sub.group(1)), int(sub.group(2))
+            pos += sub.end()
+            if entry is None and objnum is not None and start <= objnum < start + count:
+                raw = self.reader.read(pos + (objnum - start) * 20, 20)
+                found = re.match(rb"(\d{10})\s(\d{5})\s([nf])", raw)
+                if found:
+                    entry = ("offset", int(found.group(1))) if found.group(3) == b"n" else ("free",)
+            pos += count * 20
+
+    def locate(self, objnum: int) -> tuple:
+        """Finds the newest xref entry for `objnum`, following /XRefStm and /Prev."""
+        offset, seen = self.startxref, 0
+        while offset is not None and seen < MAX_XREF_SECTIONS:
+            entry, trailer = self._read_section(offset, objnum)
+            if entry is None and _int(trailer, b"XRefStm") is not None:
+                entry, _ = self._read_section(_int(trailer, b"XRefStm"), objnum)
+            if entry is not None:
+                return entry
+            offset, seen = _int(trailer, b"Prev"), seen + 1
+        raise ValueError(f"object {objnum} not found in the xref chain")
+
+    def object_bytes(self, objnum: int) -> bytes:
+        """Returns the raw body of a non-stream object."""
+        entry = self.locate(objnum)
+        if entry[0] == "offset":
+            data = self.reader.read(entry[1], 4096)
+            header = re.match(rb"\s*\d+\s+\d+\s+obj\s*", data)
+            if not header:
+                raise ValueError(f"no object at offset {entry[1]}")
+            return data[header.end():]
+        if entry[0] == "objstm":
+            stream_entry = self.locate(entry[1])
+            if stream_entry[0] != "offset":
+                raise ValueError("object stream is itself compressed")
+            d, data = self._read_stream_object(stream_entry[1])
+            first = _int(d, b"First") or 0
+            numbers = [int(x) for x in data[:first].split()]
+            pairs = dict(zip(numbers[0::2], numbers[1::2]))
+            if objnum not in pairs:
+                raise ValueError(f"object {objnum} missing from its object stream")
+            return data[first + pairs[objnum]:]
+        raise ValueError(f"object {objnum} is free")
+
+    def info(self) -> Dict[str, str]:
+        """Returns the document information dictionary with PyMuPDF-style keys (modDate, creationDate)."""
+        info_num = _ref(self.trailer, b"Info")
+        if info_num is None:
+            return {}
+        info_dict, _ = _extract_dict(self.object_bytes(info_num))
+        keys = {b"ModDate": "modDate", b"CreationDate": "creationDate", b"Title": "title",
+                b"Author": "author", b"Producer": "producer", b"Creator": "creator"}
+        metadata = {}
+        for key, name in keys.items():
+            match = re.search(rb"/" + key + rb"\s*(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>)", info_dict, re.S)
+            if match:
+                metadata[name] = _decode_pdf_string(match.group(1))
+        return metadata
+
+
+def read_pdf_info(url: str, headers: Optional[dict] = None) -> Optional[Dict[str, str]]:
+    """
+    Reads a remote PDF's metadata (modDate, creationDate, ...) with a few small Range requests.
+    Returns None when the server has no range support or the file can't be parsed this way,
+    so the caller can fall back to a full download.
+    """
+    reader = RangeReader(url, headers=headers)
+    try:
+        metadata = RemotePdf(reader).open().info()
+        print(f"|   [pdf-range] Read metadata with {reader.requests_made} requests, {reader.bytes_read / 1024:.0f} KB")
+        return metadata
+    except (RangeNotSupported, ValueError, KeyError, IndexError, zlib.error, requests.RequestException) as e:
+        print(f"|   [pdf-range] Falling back to full download for {url}: {e}")
+        return None
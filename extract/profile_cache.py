@@ -0,0 +1,67 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from extract.embedding_store import embedding_store
+
+# --- Configuration Constants ---
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", "512"))  # encoded profile sets kept (LRU)
+# "1" builds profiles with a generic company name, so one keyword's profiles are encoded once per run
+# instead of once per company. Slightly less specific profiles, far fewer encodes.
+COMPANY_AGNOSTIC_PROFILES = os.environ.get("COMPANY_AGNOSTIC_PROFILES", "0") == "1"
+GENERIC_COMPANY = "The company"
+
+ProfileBuilder = Callable[[str, str], Dict[str, str]]  # (company_name, keyword) -> {category: profile text}
+
+
+class ProfileEmbeddingCache:
+    """
+    LRU cache of encoded relationship profiles, keyed by (model, taxonomy version, company, keyword).
+    Profile texts only change with the taxonomy, the company and the keyword, so every row after the
+    first for the same key reuses the embeddings instead of re-encoding all profiles. Bump the
+    taxonomy version string whenever a profile text changes.
+
+        categories, embeddings = profile_cache.get(model, "granular-v1", build_profiles, company, keyword)
+    """
+
+    def __init__(self, maxsize: int = PROFILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, Tuple[List[str], object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model, taxonomy: str, build: ProfileBuilder, company_name: str, keyword: str,
+            company_agnostic: bool = COMPANY_AGNOSTIC_PROFILES) -> Tuple[List[str], object]:
+        """(category names, profile embeddings in the same order), encoding them only on a miss."""
+        company: Optional[str] = None if company_agnostic else company_name
+        key = (id(model), taxonomy, company, keyword)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        profiles = build(GENERIC_COMPANY if company is None else company, keyword)
+        entry = (list(profiles.keys()), embedding_store.encode(model, list(profiles.values())))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Process-wide cache shared by every classifier
+profile_cache = ProfileEmbeddingCache()
@@ -0,0 +1,112 @@
+import os
+import time
+import ipaddress
+import asyncio
+import threading
+from urllib.parse import urlparse
+from typing import Dict, Optional, Tuple
+
+# --- Configuration Constants ---
+DEFAULT_RATE = float(os.environ.get("DOMAIN_RATE", "1.0"))     # requests per second per domain
+DEFAULT_BURST = int(os.environ.get("DOMAIN_BURST", "3"))       # requests allowed back to back
+# Large sites we crawl most get their own, gentler limits
+DOMAIN_LIMITS: Dict[str, Tuple[float, int]] = {
+    "accenture.com": (0.5, 2),
+    "microsoft.com": (0.5, 2),
+    "linkedin.com": (0.2, 1),
+}
+# Second-level public suffixes, under which the registrable domain has three labels (example.co.uk).
+# A short list instead of the full Public Suffix List: it only has to cover the sites we crawl.
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.nz", "co.jp", "ne.jp", "or.jp",
+    "co.in", "net.in", "org.in", "co.kr", "or.kr", "com.br", "com.cn", "net.cn", "com.hk", "com.sg",
+    "com.mx", "com.ar", "com.tr", "com.tw", "co.za", "co.il", "com.my", "co.id", "com.ph", "com.vn",
+}
+
+
+def registrable_domain(host: str) -> str:
+    """The registrable part of a hostname: careers.accenture.com -> accenture.com, a.b.co.uk -> b.co.uk."""
+    host = host.lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split(".")
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+def domain_of(url: str) -> str:
+    """Registrable domain used as the limiter key, so every subdomain of a site shares one bucket."""
+    return registrable_domain(urlparse(url).hostname or url)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens refill per second, at most `burst` are banked."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Takes one token and returns how long the caller must wait before using it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class DomainRateLimiter:
+    """
+    Token-bucket politeness limiter keyed by domain, shared by every fetch path
+    (scanner, extractors, PDF downloader, async engine and browser) in the process.
+    """
+
+    def __init__(self, default_rate: float = DEFAULT_RATE, default_burst: int = DEFAULT_BURST,
+                 limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.limits = {registrable_domain(domain): limit
+                       for domain, limit in (DOMAIN_LIMITS if limits is None else limits).items()}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, domain: str, rate: float, burst: int):
+        """Sets the rate (requests/second) and burst for a site: the registrable domain and all its subdomains."""
+        domain = registrable_domain(domain)
+        with self._lock:
+            self.limits[domain] = (rate, burst)
+            self._buckets.pop(domain, None)
+
+    def _limits_for(self, domain: str) -> Tuple[float, int]:
+        return self.limits.get(domain, (self.default_rate, self.default_burst))
+
+    def _reserve(self, url: str) -> float:
+        domain = domain_of(url)
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = TokenBucket(*self._limits_for(domain))
+            return bucket.reserve()
+
+    def acquire(self, url: str):
+        """Blocks the calling thread until a request to `url`'s domain is allowed."""
+        wait = self._reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str):
+        """Async variant of acquire(): waits without blocking the event loop."""
+        wait = self._reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# Process-wide limiter shared by every fetch path
+limiter = DomainRateLimiter()
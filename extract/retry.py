@@ -0,0 +1,149 @@
+import time
+import heapq
+import random
+import itertools
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+try:
+    from selenium.common.exceptions import WebDriverException
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+# --- Configuration Constants ---
+MAX_ATTEMPTS = 4
+BASE_DELAY = 5      # seconds before the first retry
+MAX_DELAY = 300     # cap for both backoff and Retry-After
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """An error worth retrying later; `retry_after` (seconds) overrides the backoff when set."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either as delta-seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(exc: BaseException) -> Tuple[bool, Optional[float]]:
+    """
+    Returns (retryable, retry_after seconds or None) for an exception raised while fetching.
+    Network errors, timeouts, 408/429/5xx responses and browser failures are retryable;
+    other 4xx responses, cache misses and anything unrecognised are fatal.
+    """
+    if isinstance(exc, RetryableError):
+        return True, exc.retry_after
+
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response.headers else None
+        return status in RETRYABLE_STATUSES, retry_after
+
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True, None
+    if HTTPX_AVAILABLE and isinstance(exc, httpx.TransportError):
+        return True, None
+    if SELENIUM_AVAILABLE and isinstance(exc, WebDriverException):
+        return True, None
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True, None
+    return False, None
+
+
+def backoff_delay(attempt: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    """Exponential backoff with jitter: roughly base * 2^attempt, randomised by +/-50%."""
+    delay = min(cap, base * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.5)
+
+
+class RetryScheduler:
+    """
+    Delayed queue for failed work items. A failed item is re-queued with backoff instead of
+    sleeping, so the caller can keep processing other rows while it waits.
+
+        scheduler = RetryScheduler()
+        for item, attempt in scheduler.run(rows):
+            try:
+                process(item)
+            except Exception as e:
+                if scheduler.schedule(item, e, attempt):
+                    continue
+                handle_failure(item, e)
+    """
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap: List[Tuple[float, int, Any, int]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, item: Any, exc: BaseException, attempt: int) -> bool:
+        """
+        Queues `item` for another attempt if `exc` is retryable and attempts remain.
+        Returns False when the failure is final and the caller should record it.
+        """
+        retryable, retry_after = classify(exc)
+        if not retryable or attempt + 1 >= self.max_attempts:
+            return False
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), item, attempt + 1))
+        print(f"|   [retry] {type(exc).__name__}: attempt {attempt + 2}/{self.max_attempts} in {delay:.0f}s")
+        return True
+
+    def pop_ready(self) -> List[Tuple[Any, int]]:
+        """Removes and returns every (item, attempt) whose delay has elapsed."""
+        ready = []
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item, attempt = heapq.heappop(self._heap)
+            ready.append((item, attempt))
+        return ready
+
+    def next_ready_in(self) -> Optional[float]:
+        """Seconds until the next retry is due, or None if nothing is queued."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def run(self, items: Iterable[Any]) -> Iterator[Tuple[Any, int]]:
+        """
+        Yields (item, attempt) for every new item, interleaving retries as they become due.
+        Only sleeps once the new items are exhausted and retries are still waiting.
+        """
+        for item in items:
+            yield from self.pop_ready()
+            yield item, 0
+        while self._heap:
+            time.sleep(self.next_ready_in())
+            yield from self.pop_ready()
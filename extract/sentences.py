@@ -0,0 +1,100 @@
+import os
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from extract.embedding_store import embedding_store
+
+# --- Configuration Constants ---
+ENCODE_BATCH_SIZE = int(os.environ.get("ENCODE_BATCH_SIZE", "128"))  # texts per SentenceTransformer forward pass
+# How the vector of a whole context is made:
+#   "mean"   - mean of its sentence embeddings, which are already needed for the evidence (default). Nothing is
+#              encoded twice, and long contexts are not cut off at the model's max_seq_length (256 word pieces).
+#   "encode" - encode the joined context text as one more input (the old behaviour)
+CONTEXT_POOLING = os.environ.get("CONTEXT_POOLING", "mean").lower()
+
+
+def _unit(vectors) -> np.ndarray:
+    """Rows scaled to unit length, so a dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class IsolatedContext(str):
+    """
+    The context isolated around the keyword hits. It is the joined text of its sentences, so it can be used
+    anywhere the old context string was, and it also keeps the sentences and their character spans in the
+    page, so nothing has to segment it again. Sentence embeddings are computed once per model and shared by
+    the context vector and the evidence search.
+
+        context = sentence_window(sentences, hits, 2, 2)
+        scores = util.cos_sim(context.vector(model), profile_embeddings)[0]
+        evidence = context.evidence(model, profile_embeddings[winner])
+    """
+
+    def __new__(cls, sentences: Sequence[str], spans: Sequence[Tuple[int, int]] = (), text: Optional[str] = None):
+        context = super().__new__(cls, " ".join(sentences) if text is None else text)
+        context.sentences = list(sentences)
+        context.spans = list(spans)
+        context._embeddings = {}  # id(model) -> one row per sentence
+        return context
+
+    def embeddings(self, model) -> np.ndarray:
+        """Embedding of each sentence, encoded with `model` the first time they are needed."""
+        if id(model) not in self._embeddings:
+            encode_contexts(model, [self])
+        return self._embeddings[id(model)]
+
+    def vector(self, model, pooling: str = CONTEXT_POOLING) -> np.ndarray:
+        """Embedding of the whole context (see CONTEXT_POOLING)."""
+        if pooling == "encode" or not self.sentences:
+            return np.asarray(model.encode(str(self), convert_to_numpy=True))
+        return self.embeddings(model).mean(axis=0)
+
+    def evidence(self, model, profile_embedding, min_chars: int = 0) -> Optional[str]:
+        """The sentence closest to `profile_embedding`, among those longer than `min_chars`; None if there is none."""
+        candidates = [i for i, sentence in enumerate(self.sentences) if len(sentence) > min_chars]
+        if not candidates:
+            return None
+        scores = _unit(self.embeddings(model)[candidates]) @ _unit(profile_embedding).reshape(-1)
+        return self.sentences[candidates[int(np.argmax(scores))]]
+
+
+def encode_contexts(model, contexts: Iterable[IsolatedContext], batch_size: int = ENCODE_BATCH_SIZE):
+    """
+    Encodes the sentences of every context not yet encoded with `model`, all in one encode call.
+    Sentences already in the persistent embedding store are not encoded at all.
+    """
+    pending = [context for context in contexts if id(model) not in context._embeddings]
+    sentences = [sentence for context in pending for sentence in context.sentences]
+    if not sentences:
+        for context in pending:
+            context._embeddings[id(model)] = np.zeros((0, 0), dtype=np.float32)
+        return
+    vectors = embedding_store.encode(model, sentences, batch_size=batch_size)
+    offset = 0
+    for context in pending:
+        context._embeddings[id(model)] = vectors[offset:offset + len(context.sentences)]
+        offset += len(context.sentences)
+
+
+def sentence_window(sentences: List, hits: Iterable[int], sentences_before: int = 2,
+                    sentences_after: int = 2) -> Optional[IsolatedContext]:
+    """The spaCy sentences around each hit index, in page order, as one context; None without hits."""
+    indices = set()
+    for i in hits:
+        indices.update(range(max(0, i - sentences_before), min(len(sentences), i + sentences_after + 1)))
+    if not indices:
+        return None
+    chosen = [sentences[i] for i in sorted(indices)]
+    return IsolatedContext([sentence.text.strip() for sentence in chosen],
+                           [(sentence.start_char, sentence.end_char) for sentence in chosen])
+
+
+def as_context(nlp, context_text: str) -> IsolatedContext:
+    """`context_text` as an IsolatedContext, segmenting it only if it is a plain string."""
+    if isinstance(context_text, IsolatedContext):
+        return context_text
+    doc = nlp(str(context_text))
+    return IsolatedContext([sentence.text.strip() for sentence in doc.sents],
+                           [(sentence.start_char, sentence.end_char) for sentence in doc.sents], text=context_text)
@@ -0,0 +1,175 @@
+import os
+import re
+import json
+import time
+import threading
+import requests
+from urllib.parse import urlparse
+from typing import Optional, Tuple
+from extract.page import Page, fetch_page
+from extract.retry import RetryableError
+from extract.host_health import HostNotFoundError
+from extract.http_cache import CACHE_DIR
+from extract.normal_3 import render_page
+from extract.keywords import keyword_pattern
+
+# --- Configuration Constants ---
+TIER_MEMORY_FILE = os.environ.get("TIER_MEMORY_FILE", os.path.join(os.path.dirname(CACHE_DIR) or ".", "domain_tiers.json"))
+TIER_MEMORY_TTL = int(os.environ.get("TIER_MEMORY_TTL", str(7 * 24 * 3600)))  # seconds a "browser" domain stays one
+BROWSER_RETRY_EVERY = int(os.environ.get("BROWSER_RETRY_EVERY", "20"))  # retry static on every Nth fetch of such a domain
+BLOCKED_STATUSES = {401, 403, 429, 503}
+# Statuses a domain answers every static GET with when it only lets browsers in; 429/503 are often one-offs
+STICKY_BLOCKED_STATUSES = {401, 403}
+# Why a static page failed, for the reasons the browser can fix for a whole domain; transient and
+# page-specific failures (other HTTP errors, network errors) are never remembered
+STICKY_REASONS = ("blocked", "js_shell", "keyword_missing")
+BLOCK_MARKERS = [
+    "captcha", "cf-chl", "checking your browser", "attention required", "access denied",
+    "request unsuccessful", "are you a robot", "unusual traffic", "bot detection",
+]
+JS_SHELL_MARKERS = [
+    "enable javascript", "javascript is required", "javascript is disabled",
+    "requires javascript", "please turn on javascript",
+]
+EMPTY_APP_ROOT = re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|main)["\'][^>]*>\s*</div>', re.I)
+MIN_VISIBLE_CHARS = 500
+
+
+def _domain(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _visible_text(html: str) -> str:
+    """Rough tag-stripped text; good enough to judge a page without a full parse."""
+    html = re.sub(r"(?is)<(script|style|noscript|template)\b.*?</\1>", " ", html)
+    html = re.sub(r"(?s)<[^>]+>", " ", html)
+    return re.sub(r"\s+", " ", html).strip()
+
+
+def escalation_reason(page: Page, keyword: str) -> Optional[str]:
+    """
+    Decides whether a statically fetched page is good enough.
+    Returns why the browser is needed ("blocked", "js_shell", "keyword_missing") or None.
+    """
+    html = page.html or ""
+    text = _visible_text(html) if page.text is None else re.sub(r"\s+", " ", page.text).strip()
+    lower = text.lower()
+
+    if len(text) < 2000 and any(marker in lower for marker in BLOCK_MARKERS):
+        return "blocked"
+    if len(text) < MIN_VISIBLE_CHARS and (EMPTY_APP_ROOT.search(html) or html.lower().count("<script") >= 5):
+        return "js_shell"
+    if any(marker in lower for marker in JS_SHELL_MARKERS) and len(text) < 5 * MIN_VISIBLE_CHARS:
+        return "js_shell"
+    if keyword and not keyword_pattern(keyword).search(text):
+        return "keyword_missing"
+    return None
+
+
+def static_failure(error: Exception) -> Tuple[str, bool]:
+    """(reason, sticky) for a static fetch that raised `error` (requests or httpx)."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in BLOCKED_STATUSES:
+        return "blocked", status in STICKY_BLOCKED_STATUSES
+    if status is not None:
+        return f"http_{status}", False
+    return f"static_failed ({type(error).__name__})", False
+
+
+class TierMemory:
+    """
+    Remembers, per domain, which fetch tier produced usable pages; persisted between runs.
+    A "browser" entry expires after `ttl` seconds, and every `retry_every`-th fetch of such a domain tries
+    the static tier again, so a domain that no longer needs the browser moves back down.
+    """
+
+    def __init__(self, path: str = TIER_MEMORY_FILE, ttl: int = TIER_MEMORY_TTL,
+                 retry_every: int = BROWSER_RETRY_EVERY):
+        self.path = path
+        self.ttl = ttl
+        self.retry_every = retry_every
+        self._lock = threading.Lock()
+        self._browser_hits = {}  # domain -> fetches sent straight to the browser in this run
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tiers = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            tiers = {}
+        # Entries from before the TTL existed are plain strings and count as expired
+        self.tiers = {domain: entry if isinstance(entry, dict) else {"tier": entry, "at": 0}
+                      for domain, entry in tiers.items()}
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self.tiers.get(_domain(url))
+        if entry is None or (entry["tier"] == "browser" and time.time() - entry["at"] > self.ttl):
+            return None
+        return entry["tier"]
+
+    def needs_browser(self, url: str) -> bool:
+        """True when the domain should skip the static tier for this fetch."""
+        if self.get(url) != "browser":
+            return False
+        domain = _domain(url)
+        with self._lock:
+            self._browser_hits[domain] = self._browser_hits.get(domain, 0) + 1
+            return not (self.retry_every and self._browser_hits[domain] % self.retry_every == 0)
+
+    def record(self, url: str, tier: str):
+        domain = _domain(url)
+        with self._lock:
+            entry = self.tiers.get(domain)
+            if entry is not None and entry["tier"] == tier and (tier != "browser" or entry["at"]):
+                return
+            self.tiers[domain] = {"tier": tier, "at": int(time.time())}
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(self.tiers, f, indent=2, sort_keys=True)
+            except IOError as e:
+                print(f"  [WARNING] Could not save domain tier memory: {e}")
+
+
+tier_memory = TierMemory()
+
+
+def fetch_tiered(url: str, keyword: str, page: Page = None, static_error: Exception = None) -> Page:
+    """
+    Returns the cheapest usable Page for `url`: a plain HTTP GET first, escalating to the headless
+    browser only when the static HTML is blocked, a JavaScript shell, or lacks the keyword.
+    Domains where only the browser worked recently go straight to it (see TierMemory).
+    Pass a prefetched static `page` to skip the HTTP request; it is always checked first.
+    Pass the prefetch's `static_error` instead when it failed, so the static request isn't repeated.
+    """
+    sticky = False  # whether the browser fixing this page says something about the whole domain
+    if isinstance(static_error, (RetryableError, HostNotFoundError)):
+        raise static_error  # the host is down or does not exist for the browser too
+    if page is not None or static_error is not None or not tier_memory.needs_browser(url):
+        try:
+            if static_error is not None:
+                reason, sticky = static_failure(static_error)
+            else:
+                if page is None:
+                    page = fetch_page(url)
+                if page.is_pdf:
+                    return page
+                reason = escalation_reason(page, keyword)
+                sticky = reason in STICKY_REASONS
+        except requests.RequestException as e:
+            reason, sticky = static_failure(e)
+
+        if reason is None:
+            tier_memory.record(url, "http")
+            return page
+        print(f"|   [tier] Escalating to browser: {reason}")
+    else:
+        reason = "domain_needs_browser"
+
+    rendered = render_page(url, keyword)
+    if sticky:
+        if escalation_reason(rendered, keyword) is None:
+            tier_memory.record(url, "browser")
+        elif reason == "keyword_missing":
+            # The browser found nothing extra; the keyword simply isn't on the page
+            tier_memory.record(url, "http")
+    return rendered
@@ -2,6 +2,10 @@ from extract.normal_3 import *
 from extract.pdf_3_adv import *
 from explain_io import *
 from extract.date_me_3 import *
+from extract.fetch_async import Prefetcher
+from extract.page import Page
+from extract.tiered import fetch_tiered
+from extract.retry import RetryScheduler
 from info import *
 import pandas as pd
 from datetime import datetime
@@ -158,9 +162,25 @@ def main():
         print(f"| An unexpected error occurred while reading the input file: {e}")
         return
 
+    # Download every pending row's page concurrently, a batch at a time, ahead of the row loop
+    pending_urls = []
+    for _, row in df_input.iterrows():
+        url = row['company_url']
+        if not url.startswith(("http://", "https://")):
+            url = "https://" + url
+        if (url, row['keyword']) in already_processed:
+            continue
+        if url.lower().endswith(".pdf") and 'context' in df_input.columns and row.get('context') is not None:
+            continue  # date-only PDF rows read their metadata over byte ranges instead
+        pending_urls.append(url)
+    prefetcher = Prefetcher(pending_urls)
+
     new_items_processed = 0
+    fallback_ids = {}  # row index -> generated Company ID, stable across retries
+    # Rows whose fetch fails with a retryable error are re-queued with backoff, not slept on
+    retry_scheduler = RetryScheduler()
 
-    for index, row in df_input.iterrows():
+    for (index, row), attempt in retry_scheduler.run(df_input.iterrows()):
         # --- CHANGE 2: Read all required columns from the row, including the new domain ---
         # comp_name = row['company_name']
         current_url = row['company_url']
@@ -173,7 +193,8 @@ def main():
         if (current_url, keyword) in already_processed:
             continue
 
-        new_items_processed += 1
+        if attempt == 0:
+            new_items_processed += 1
         # ----------------------------------------------------------------------
         # Company Name - Updated part
         company_name_from_csv = row.get('company_name')
@@ -190,38 +211,57 @@ def main():
         if company_id is not None:
             comp_id = int(company_id)
         else:
-            comp_id = new_items_processed
+            comp_id = fallback_ids.setdefault(index, new_items_processed)
         # -------------------------------------------------------------
 
         # Check if context is provided in the input data
         provided_context = row.get('context') if 'context' in df_input.columns else None
 
+        contexts = date = None
         try:
+            prefetched = prefetcher.result(current_url)  # Page, the exception of a failed prefetch, or None
+            page = prefetched if isinstance(prefetched, Page) else None
             if provided_context is not None:
                 # Use the provided context from input file
                 contexts = provided_context
-                # For PDF files, we still need to call pdf() to get the date
+                # For PDF files, only the date is needed (read from the metadata over byte ranges)
                 if current_url.lower().endswith(".pdf"):
-                    _, date = pdf(current_url, keyword)  # Only get date, discard the context
+                    date = pdf_date(current_url, page=page)  # Only get date, no context extraction
                     print("|=▶ Using provided context from input file, but getting date from PDF")
                 else:
-                    date = date_me(current_url)  # Get date using the existing function
+                    date = date_me(current_url, page=page)  # Get date using the existing function
                     print("|=▶ Using provided context from input file")
             elif current_url.lower().endswith(".pdf"):
-                contexts, date = pdf(current_url, keyword)
+                contexts, date = pdf(current_url, keyword, page=page)
                 print("|=▶ Using PDF function")
             else:
-                contexts = normal(current_url, keyword)
-                date = date_me(current_url)
+                page = fetch_tiered(current_url, keyword, page=page,  # Browser only if static HTML isn't enough
+                                    static_error=prefetched if isinstance(prefetched, Exception) else None)
+                contexts = normal(current_url, keyword, page=page)
+                date = date_me(current_url, page=page)
                 print("|=▶ Using HTML function")
 
-            # gemini logic ---
-            gemini_analysis = explain(
-                chunk_text=contexts,
-                keyword_tech=keyword,
-                company_name=comp_name,
-                page_url=current_url  # Page url to LLM
-            )
+        except Exception as e:
+            if retry_scheduler.schedule((index, row), e, attempt):
+                prefetcher.retain(current_url)
+                print(f"|▶ [RETRY] Fetch failed, row re-queued | Continuing to next URL.")
+                continue
+            print(f"|▶  [ERROR] Failed to process | Continuing to next URL.")
+            gemini_analysis = None
+        else:
+            # gemini logic --- (not in the retried block: an LLM failure must not fetch the page again)
+            try:
+                gemini_analysis = explain(
+                    chunk_text=contexts,
+                    keyword_tech=keyword,
+                    company_name=comp_name,
+                    page_url=current_url  # Page url to LLM
+                )
+            except Exception as e:
+                print(f"|▶  [ERROR] LLM analysis failed: {type(e).__name__}: {e}")
+                gemini_analysis = None
+
+        if gemini_analysis is not None:
             usage_indicated = "Yes" if gemini_analysis.get("uses_tech") else "No"
             explanation = gemini_analysis.get("explanation", "No explanation provided.")
 
@@ -238,10 +278,8 @@ def main():
                 "Usage Indicated": usage_indicated,
                 "Explanation": explanation
             }
-
-        except Exception as e:
-            print(f"|▶  [ERROR] Failed to process | Continuing to next URL.")
-
+        else:
+            usage_indicated = " "
             result = {
                 "Company ID": comp_id,  # comp_id
                 "Company Name": comp_name,
@@ -250,7 +288,7 @@ def main():
                 "Keyword": keyword,
                 "Date": date or "Not found",
                 "Context": contexts if contexts else "No context found.",
-                "Usage Indicated": " ",
+                "Usage Indicated": usage_indicated,
                 "Explanation": f"Error"
             }
             print(f"|====▶ Usage Indicated: {usage_indicated}")
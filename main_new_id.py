@@ -2,6 +2,10 @@ from extract.normal_3 import *
 from extract.pdf_3_adv import *
 from explain_new_json import *
 from extract.date_me_3 import *
+from extract.fetch_async import Prefetcher
+from extract.page import Page
+from extract.tiered import fetch_tiered
+from extract.retry import RetryScheduler
 from info import *
 import pandas as pd
 from datetime import datetime
@@ -157,9 +161,25 @@ def main():
         print(f"| An unexpected error occurred while reading the input file: {e}")
         return
 
+    # Download every pending row's page concurrently, a batch at a time, ahead of the row loop
+    pending_urls = []
+    for _, row in df_input.iterrows():
+        url = row['company_url']
+        if not url.startswith(("http://", "https://")):
+            url = "https://" + url
+        if (url, row['keyword']) in already_processed:
+            continue
+        if url.lower().endswith(".pdf") and 'context' in df_input.columns and row.get('context') is not None:
+            continue  # date-only PDF rows read their metadata over byte ranges instead
+        pending_urls.append(url)
+    prefetcher = Prefetcher(pending_urls)
+
     new_items_processed = 0
+    fallback_ids = {}  # row index -> generated Company ID, stable across retries
+    # Rows whose fetch fails with a retryable error are re-queued with backoff, not slept on
+    retry_scheduler = RetryScheduler()
 
-    for index, row in df_input.iterrows():
+    for (index, row), attempt in retry_scheduler.run(df_input.iterrows()):
         # --- CHANGE 2: Read all required columns from the row, including the new domain ---
         # comp_name = row['company_name']
         current_url = row['company_url']
@@ -172,7 +192,8 @@ def main():
         if (current_url, keyword) in already_processed:
             continue
 
-        new_items_processed += 1
+        if attempt == 0:
+            new_items_processed += 1
         # ----------------------------------------------------------------------
         # Company Name - Updated part
         company_name_from_csv = row.get('company_name')
@@ -186,7 +207,7 @@ def main():
             comp_id = int(company_id)
             ind = f"{index+1}. ID: {comp_id}"
         else:
-            comp_id = new_items_processed
+            comp_id = fallback_ids.setdefault(index, new_items_processed)
             ind = index+1
         # ---------------------------
 
@@ -199,56 +220,42 @@ def main():
         provided_context = row.get('context') if 'context' in df_input.columns else None
 
         try:
+            prefetched = prefetcher.result(current_url)  # Page, the exception of a failed prefetch, or None
+            page = prefetched if isinstance(prefetched, Page) else None
             if provided_context is not None:
                 # Use the provided context from input_file
                 contexts = provided_context
-                # For PDF files, we still need to call pdf() to get the date
+                # For PDF files, only the date is needed (read from the metadata over byte ranges)
                 if current_url.lower().endswith(".pdf"):
-                    _, date = pdf(current_url, keyword)  # Only get date, discard the context
+                    date = pdf_date(current_url, page=page)  # Only get date, no context extraction
                     print("|▶ Using provided context from input file, but getting date from PDF")
                 else:
-                    date = date_me(current_url)  # Get date using the existing function
+                    date = date_me(current_url, page=page)  # Get date using the existing function
                     print("|▶ Using provided context from input file")
             elif current_url.lower().endswith(".pdf"):
-                contexts, date = pdf(current_url, keyword)
+                contexts, date = pdf(current_url, keyword, page=page)
                 print("|▶ Using PDF function")
 
             else:
-                contexts = normal(current_url, keyword)
-                date = date_me(current_url)
+                page = fetch_tiered(current_url, keyword, page=page,  # Browser only if static HTML isn't enough
+                                    static_error=prefetched if isinstance(prefetched, Exception) else None)
+                contexts = normal(current_url, keyword, page=page)
+                date = date_me(current_url, page=page)
                 #                 print(contexts[0:10])
                 print("|▶ Using HTML function")
 
-            gemini_analysis = explain(
-                chunk_text=contexts,
-                keyword_tech=keyword,
-                company_name=comp_name,
-                page_url=current_url  # Page url to LLM
-            )
-            usage_indicated = "Yes" if gemini_analysis.get("uses_tech") else "No"
-            explanation = gemini_analysis.get("explanation", "No explanation provided.")
-            push_context = gemini_analysis.get("push_context", "No context found.")
-
-            print(f"|====▶ Usage Indicated: {usage_indicated}")
-            result = {
-                "Company ID": comp_id, #comp_id
-                "Company Name": comp_name,
-                "Domain": domain_from_csv,
-                "Page URL": current_url,
-                "Keyword": keyword,
-                "Date": date or "Not found",
-                "Context": push_context if push_context else "No context found",
-                "Usage Indicated": usage_indicated,
-                "Explanation": explanation
-            }
-
-
         except Exception as e:
+            if retry_scheduler.schedule((index, row), e, attempt):
+                prefetcher.retain(current_url)
+                print(f"|▶ [RETRY] Fetch failed, row re-queued | Continuing to next URL.")
+                continue
             print(f"|▶ [ERROR] Failed to process: | Continuing to next URL.")
-            contexts_no = "No Context found"
+            contexts, date = "No Context found", "Not Found"
 
+        # Not in the retried block: an LLM failure must not fetch and render the page again
+        try:
             gemini_analysis = explain(
-                chunk_text=contexts_no,
+                chunk_text=contexts,
                 keyword_tech=keyword,
                 company_name=comp_name,
                 page_url=current_url  # Page url to LLM
@@ -256,19 +263,22 @@ def main():
             usage_indicated = "Yes" if gemini_analysis.get("uses_tech") else "No"
             explanation = gemini_analysis.get("explanation", "No explanation provided.")
             push_context = gemini_analysis.get("push_context", "No context found.")
-            print(f"|====▶ Usage Indicated: {usage_indicated}")
-
-            result = {
-                "Company ID": comp_id, #comp_id
-                "Company Name": comp_name,
-                "Domain": domain_from_csv,
-                "Page URL": current_url,
-                "Keyword": keyword,
-                "Date": "Not Found",  # add date here
-                "Context": push_context if push_context else "No context found",
-                "Usage Indicated": usage_indicated,
-                "Explanation": explanation
-            }
+        except Exception as e:
+            print(f"|▶ [ERROR] LLM analysis failed: {type(e).__name__}: {e}")
+            usage_indicated, explanation, push_context = " ", "Error", None
+
+        print(f"|====▶ Usage Indicated: {usage_indicated}")
+        result = {
+            "Company ID": comp_id, #comp_id
+            "Company Name": comp_name,
+            "Domain": domain_from_csv,
+            "Page URL": current_url,
+            "Keyword": keyword,
+            "Date": date or "Not found",
+            "Context": push_context if push_context else "No context found",
+            "Usage Indicated": usage_indicated,
+            "Explanation": explanation
+        }
 
         duration = time.time() - start_time
         result["Processing Time (s)"] = round(duration, 2)
@@ -245,13 +245,19 @@
 # #     print("No content was extracted.")
 #
 
-import spacy
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 import numpy as np
+from extract.matcher import get_matcher, sentence_hits
+from extract.keywords import keyword_matcher
+from extract.nlp import sentence_pipeline
+from extract.embeddings import load_model
+from extract.profile_cache import profile_cache
+from extract.sentences import as_context, sentence_window
 
 # --- SETUP ---
-nlp = spacy.load("en_core_web_sm")
-semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+nlp = sentence_pipeline()  # only doc.sents is used: no tagger/parser/NER
+semantic_model = load_model()  # all-MiniLM-L6-v2 on the configured backend (see extract.embeddings)
+PROFILE_TAXONOMY = "prime_extract/granular-v1"  # bump whenever a profile text changes
 
 # --- FUNCTIONS ---
 def isolate_focused_context(text, company_name, keyword, sentences_before=2, sentences_after=2):
@@ -262,45 +268,23 @@ def isolate_focused_context(text, company_name, keyword, sentences_before=2, sen
     """
     doc = nlp(str(text))
     sentences = list(doc.sents)
-    relevant_indices = set()
 
-    # Priority 1: Find sentences with BOTH company and keyword for precision.
-    for i, sentence in enumerate(sentences):
-        sent_text_lower = sentence.text.lower()
-        company_names = [company_name.lower(), company_name.lower().replace(" ", "")]
-        if any(name in sent_text_lower for name in company_names) and keyword.lower() in sent_text_lower:
-            start_index = max(0, i - sentences_before)
-            end_index = min(len(sentences), i + sentences_after + 1)
-            relevant_indices.update(range(start_index, end_index))
+    sentence_starts = [sentence.start_char for sentence in sentences]
+    keyword_hits = sentence_hits(keyword_matcher(keyword), doc.text, sentence_starts)
+    company_names = (company_name, company_name.replace(" ", ""))
+    company_hits = sentence_hits(get_matcher(company_names), doc.text, sentence_starts)
 
+    # Priority 1: Find sentences with BOTH company and keyword for precision.
     # Priority 2: If no specific link is found, analyze the general context around the keyword.
-    if not relevant_indices:
-        for i, sentence in enumerate(sentences):
-            if keyword.lower() in sentence.text.lower():
-                start_index = max(0, i - sentences_before)
-                end_index = min(len(sentences), i + sentences_after + 1)
-                relevant_indices.update(range(start_index, end_index))
-
-    if not relevant_indices:
-        return None
-
-    sorted_indices = sorted(list(relevant_indices))
-    context_text = " ".join([sentences[i].text.strip() for i in sorted_indices])
-    return context_text
-
-def analyze_relationship_semantically(context_text, company_name, keyword):
-    """
-    Analyzes the context to classify the relationship using a detailed set of profiles.
-    Returns the top 3 predictions and the best evidence sentence.
-    """
-    if not context_text:
-        return {"top_predictions": [{"category": "Uncertain", "confidence": 0.0}],
-                "evidence": "Keyword not found in text."}
+    # The context keeps its sentences, so the analysis never segments or encodes them a second time.
+    return sentence_window(sentences, (keyword_hits & company_hits) or keyword_hits, sentences_before, sentences_after)
 
+def build_relationship_profiles(company_name, keyword):
+    """The granular relationship profiles for one company and keyword (PROFILE_TAXONOMY)."""
     # IMPROVEMENT 2: Cleaner, More Precise Profiles
     # The redundant, broad profiles ("Service Provider/Partner", "Service User", "Informative") have been removed
     # to force the model to choose a more specific and useful category.
-    relationship_profiles = {
+    return {
         # ===============================================
         # === CONTENT & PUBLISHING SIGNALS ===
         # ===============================================
@@ -406,21 +390,33 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
         )
     }
 
-    # --- Step 1: Encode Profiles and Context ---
-    profile_embeddings = semantic_model.encode(list(relationship_profiles.values()))
-    context_embedding = semantic_model.encode(context_text)
+
+def analyze_relationship_semantically(context_text, company_name, keyword):
+    """
+    Analyzes the context to classify the relationship using a detailed set of profiles.
+    Returns the top 3 predictions and the best evidence sentence.
+    """
+    if not context_text:
+        return {"top_predictions": [{"category": "Uncertain", "confidence": 0.0}],
+                "evidence": "Keyword not found in text."}
+    context = as_context(nlp, context_text)  # sentences and their embeddings are shared by every step below
+
+    # --- Step 1: Encode Profiles and Context (profiles come from the shared embedding cache) ---
+    categories, profile_embeddings = profile_cache.get(semantic_model, PROFILE_TAXONOMY, build_relationship_profiles,
+                                                       company_name, keyword)
+    context_embedding = context.vector(semantic_model)
 
     # --- Step 2: Calculate Similarity Scores ---
     similarities = util.cos_sim(context_embedding, profile_embeddings)[0]
 
     # --- Step 3: Get Top 3 Predictions ---
     # IMPROVEMENT 3: Richer Output with Top 3 Predictions
-    top_k = min(3, len(relationship_profiles))
+    top_k = min(3, len(categories))
     top_indices = np.argsort(similarities)[-top_k:][::-1]  # Get indices of top k scores, sorted descending
 
     predictions = []
     for index in top_indices:
-        category = list(relationship_profiles.keys())[index]
+        category = categories[index]
         confidence = float(similarities[index])
         predictions.append({"category": category, "confidence": round(confidence, 4)})
 
@@ -428,14 +424,10 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
     best_prediction_index = top_indices[0]
     winning_profile_embedding = profile_embeddings[best_prediction_index]
 
-    context_sentences = [sent.text.strip() for sent in nlp(context_text).sents if len(sent.text.strip()) > 10]
-    if not context_sentences:
+    evidence_sentence = context.evidence(semantic_model, winning_profile_embedding, min_chars=10)
+    if evidence_sentence is None:
         return {"top_predictions": predictions, "evidence": "No suitable sentences found for evidence."}
 
-    sentence_embeddings = semantic_model.encode(context_sentences)
-    evidence_similarities = util.cos_sim(winning_profile_embedding, sentence_embeddings)[0]
-    best_sentence_index = np.argmax(evidence_similarities)
-    evidence_sentence = context_sentences[best_sentence_index]
     return {
         "top_predictions": predictions,
         "evidence": evidence_sentence
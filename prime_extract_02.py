@@ -1,10 +1,16 @@
-import spacy
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 import numpy as np
+from extract.matcher import get_matcher, sentence_hits
+from extract.keywords import keyword_matcher
+from extract.nlp import sentence_pipeline
+from extract.embeddings import load_model
+from extract.profile_cache import profile_cache
+from extract.sentences import as_context, sentence_window
 
 # --- SETUP: Models are loaded once when the module is imported for efficiency ---
-nlp = spacy.load("en_core_web_sm")
-semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+nlp = sentence_pipeline()  # only doc.sents is used: no tagger/parser/NER
+semantic_model = load_model()  # all-MiniLM-L6-v2 on the configured backend (see extract.embeddings)
+PROFILE_TAXONOMY = "prime_extract_02/universal-v1"  # bump whenever a profile text changes
 
 
 # --- CORE FUNCTIONS ---
@@ -16,43 +22,21 @@ def isolate_focused_context(text, company_name, keyword, sentences_before=2, sen
     """
     doc = nlp(str(text))
     sentences = list(doc.sents)
-    relevant_indices = set()
+
+    sentence_starts = [sentence.start_char for sentence in sentences]
+    keyword_hits = sentence_hits(keyword_matcher(keyword), doc.text, sentence_starts)
+    company_names = (company_name, company_name.replace(" ", ""))
+    company_hits = sentence_hits(get_matcher(company_names), doc.text, sentence_starts)
 
     # Priority 1: Find sentences with BOTH company and keyword for precision.
-    for i, sentence in enumerate(sentences):
-        sent_text_lower = sentence.text.lower()
-        company_names = [company_name.lower(), company_name.lower().replace(" ", "")]
-        if any(name in sent_text_lower for name in company_names) and keyword.lower() in sent_text_lower:
-            start_index = max(0, i - sentences_before)
-            end_index = min(len(sentences), i + sentences_after + 1)
-            relevant_indices.update(range(start_index, end_index))
     # Priority 2: If no specific link is found, analyze the general context around the keyword.
-    if not relevant_indices:
-        for i, sentence in enumerate(sentences):
-            if keyword.lower() in sentence.text.lower():
-                start_index = max(0, i - sentences_before)
-                end_index = min(len(sentences), i + sentences_after + 1)
-                relevant_indices.update(range(start_index, end_index))
-
-    if not relevant_indices:
-        return None
-
-    sorted_indices = sorted(list(relevant_indices))
-    context_text = " ".join([sentences[i].text.strip() for i in sorted_indices])
-    return context_text
+    # The context keeps its sentences, so the analysis never segments or encodes them a second time.
+    return sentence_window(sentences, (keyword_hits & company_hits) or keyword_hits, sentences_before, sentences_after)
 
 
-def analyze_relationship_semantically(context_text, company_name, keyword):
-    """
-    Analyzes the context to classify the relationship using a detailed set of profiles.
-    Returns the top 3 predictions and the best evidence sentence.
-    """
-    if not context_text:
-        return {"top_predictions": [{"category": "Uncertain", "confidence": 0.0}],
-                "evidence": "Keyword not found in text."}
-
-    # The Universal, Non-Redundant Relationship Profiles Dictionary
-    relationship_profiles = {
+def build_relationship_profiles(company_name, keyword):
+    """The universal, non-redundant relationship profiles for one company and keyword (PROFILE_TAXONOMY)."""
+    return {
         # ... [The full, universal dictionary is placed here] ...
         # CONTENT & PUBLISHING SIGNALS
         "Content_Informational_Guide": (
@@ -107,18 +91,30 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
             f"{company_name} is responsible for supporting, monitoring, and maintaining systems using {keyword}.")
     }
 
-    # --- Analysis Steps ---
-    profile_embeddings = semantic_model.encode(list(relationship_profiles.values()))
-    context_embedding = semantic_model.encode(context_text)
+
+def analyze_relationship_semantically(context_text, company_name, keyword):
+    """
+    Analyzes the context to classify the relationship using a detailed set of profiles.
+    Returns the top 3 predictions and the best evidence sentence.
+    """
+    if not context_text:
+        return {"top_predictions": [{"category": "Uncertain", "confidence": 0.0}],
+                "evidence": "Keyword not found in text."}
+    context = as_context(nlp, context_text)  # sentences and their embeddings are shared by every step below
+
+    # --- Analysis Steps (profiles come from the shared embedding cache) ---
+    categories, profile_embeddings = profile_cache.get(semantic_model, PROFILE_TAXONOMY, build_relationship_profiles,
+                                                       company_name, keyword)
+    context_embedding = context.vector(semantic_model)
     similarities = util.cos_sim(context_embedding, profile_embeddings)[0]
 
     # Return top 3 predictions for a richer analysis
-    top_k = min(3, len(relationship_profiles))
+    top_k = min(3, len(categories))
     top_indices = np.argsort(similarities)[-top_k:][::-1]
 
     predictions = []
     for index in top_indices:
-        category = list(relationship_profiles.keys())[index]
+        category = categories[index]
         confidence = float(similarities[index])
         predictions.append({"category": category, "confidence": round(confidence, 4)})
 
@@ -126,14 +122,10 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
     best_prediction_index = top_indices[0]
     winning_profile_embedding = profile_embeddings[best_prediction_index]
 
-    context_sentences = [sent.text.strip() for sent in nlp(context_text).sents if len(sent.text.strip()) > 10]
-    if not context_sentences:
+    evidence_sentence = context.evidence(semantic_model, winning_profile_embedding, min_chars=10)
+    if evidence_sentence is None:
         return {"top_predictions": predictions, "evidence": "No suitable sentences found for evidence."}
 
-    sentence_embeddings = semantic_model.encode(context_sentences)
-    evidence_similarities = util.cos_sim(winning_profile_embedding, sentence_embeddings)[0]
-    best_sentence_index = np.argmax(evidence_similarities)
-    evidence_sentence = context_sentences[best_sentence_index]
 
     return {
         "top_predictions": predictions,
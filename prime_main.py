@@ -1,14 +1,31 @@
-import spacy
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
+import os
 from dataclasses import dataclass
+from extract.matcher import sentence_hits
+from extract.keywords import keyword_matcher
+from extract.nlp import sentence_pipeline, SENTENCE_MODE
+from extract.embeddings import load_model, EMBEDDING_BACKEND, EMBEDDING_THREADS
+from extract.profile_cache import profile_cache
+from extract.sentences import CONTEXT_POOLING, ENCODE_BATCH_SIZE, IsolatedContext, as_context, encode_contexts, sentence_window
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PROFILE_TAXONOMY = "prime_main/relationship-v1"  # bump whenever a profile text in get_relationship_profiles changes
+ANALYZE_BATCH_SIZE = int(os.environ.get("ANALYZE_BATCH_SIZE", "256"))  # rows per analyze_many batch
+
+
+def _normalize(vectors) -> np.ndarray:
+    """Rows scaled to unit length, so a dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
 
 @dataclass
 class AnalysisResult:
@@ -22,12 +39,17 @@ class AnalysisResult:
 class RelationshipAnalyzer:
     """Analyzes relationships between companies and technologies using semantic similarity"""
 
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', spacy_model: str = "en_core_web_sm"):
-        """Initialize the analyzer with specified models"""
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', spacy_model: str = "en_core_web_sm",
+                 sentence_mode: str = SENTENCE_MODE, embedding_backend: str = EMBEDDING_BACKEND,
+                 embedding_threads: int = EMBEDDING_THREADS):
+        """
+        Initialize the analyzer with specified models (spaCy only segments sentences, see extract.nlp;
+        embedding_backend "onnx" runs the int8-quantized graph, see extract.embeddings)
+        """
         try:
-            self.nlp = spacy.load(spacy_model)
-            self.semantic_model = SentenceTransformer(model_name)
-            logger.info(f"Loaded models: {spacy_model}, {model_name}")
+            self.nlp = sentence_pipeline(spacy_model, sentence_mode)
+            self.semantic_model = load_model(model_name, embedding_backend, embedding_threads)
+            logger.info(f"Loaded models: {spacy_model} ({sentence_mode}), {model_name} ({embedding_backend})")
         except Exception as e:
             logger.error(f"Error loading models: {e}")
             raise
@@ -42,41 +64,37 @@ class RelationshipAnalyzer:
             keyword: Primary keyword to search for
             sentences_before: Number of sentences before keyword to include
             sentences_after: Number of sentences after keyword to include
-            additional_keywords: Additional keywords to search for
+            additional_keywords: Additional keywords to search for, on top of the keyword's aliases
 
         Returns:
             Context text containing relevant sentences or None if not found
         """
         if not text or not keyword:
             return None
+        return self._context_from_doc(self.nlp(str(text)), keyword, sentences_before, sentences_after,
+                                      additional_keywords)
 
-        doc = self.nlp(str(text))
+    def _context_from_doc(self, doc, keyword: str, sentences_before: int = 2, sentences_after: int = 2,
+                          additional_keywords: List[str] = None) -> Optional[IsolatedContext]:
+        """isolate_context on an already segmented spaCy doc (shared with the batch path)."""
         sentences = list(doc.sents)
-        relevant_indices = set()
-
-        # Build search terms
-        search_terms = [keyword.lower()]
-        if additional_keywords:
-            search_terms.extend([term.lower() for term in additional_keywords])
-
-        # Find sentences containing any search term
-        for i, sentence in enumerate(sentences):
-            sentence_text = sentence.text.lower()
-            if any(term in sentence_text for term in search_terms):
-                start_index = max(0, i - sentences_before)
-                end_index = min(len(sentences), i + sentences_after + 1)
-                relevant_indices.update(range(start_index, end_index))
-
-        if not relevant_indices:
+
+        # Search terms: the keyword, its registered aliases and any additional keywords
+        matcher = keyword_matcher(keyword, *(additional_keywords or []))
+        search_terms = matcher.keywords
+
+        # Find sentences containing any search term (one pass over the text for all terms)
+        sentence_starts = [sentence.start_char for sentence in sentences]
+        hits = sentence_hits(matcher, doc.text, sentence_starts)
+
+        # Combine relevant sentences; the context keeps them, so they are never segmented or encoded again
+        context = sentence_window(sentences, hits, sentences_before, sentences_after)
+        if context is None:
             logger.warning(f"No sentences found containing keywords: {search_terms}")
             return None
 
-        # Combine relevant sentences
-        sorted_indices = sorted(list(relevant_indices))
-        context_text = " ".join([sentences[i].text.strip() for i in sorted_indices])
-
-        logger.info(f"Extracted context from {len(sorted_indices)} sentences")
-        return context_text
+        logger.info(f"Extracted context from {len(context.sentences)} sentences")
+        return context
 
     def get_relationship_profiles(self, company_name: str, keyword: str) -> Dict[str, str]:
         """
@@ -135,13 +153,13 @@ class RelationshipAnalyzer:
                 all_scores={}
             )
 
-        # Get relationship profiles
-        relationship_profiles = self.get_relationship_profiles(company_name, keyword)
-
         try:
-            # Encode profiles and context
-            profile_embeddings = self.semantic_model.encode(list(relationship_profiles.values()))
-            context_embedding = self.semantic_model.encode(context_text)
+            # Encode context; profile embeddings come from the shared cache (encoded once per company/keyword)
+            categories, profile_embeddings = profile_cache.get(
+                self.semantic_model, PROFILE_TAXONOMY, self.get_relationship_profiles, company_name, keyword
+            )
+            context = as_context(self.nlp, context_text)
+            context_embedding = context.vector(self.semantic_model)
 
             # Calculate similarity scores
             similarities = util.cos_sim(context_embedding, profile_embeddings)[0]
@@ -149,17 +167,17 @@ class RelationshipAnalyzer:
             # Create scores dictionary
             all_scores = {
                 category: float(score)
-                for category, score in zip(relationship_profiles.keys(), similarities)
+                for category, score in zip(categories, similarities)
             }
 
             # Find best match
             top_score_index = np.argmax(similarities)
             confidence_score = float(similarities[top_score_index])
-            winner_category = list(relationship_profiles.keys())[top_score_index]
+            winner_category = categories[top_score_index]
 
             # Extract best supporting sentence
             evidence_sentence = self._extract_best_evidence(
-                context_text, profile_embeddings[top_score_index]
+                context, profile_embeddings[top_score_index]
             )
 
             logger.info(f"Classification: {winner_category} (confidence: {confidence_score:.3f})")
@@ -168,7 +186,7 @@ class RelationshipAnalyzer:
                 category=winner_category,
                 confidence=round(confidence_score, 4),
                 evidence=evidence_sentence,
-                context_chunk=context_text,
+                context_chunk=str(context),
                 all_scores={k: round(v, 4) for k, v in all_scores.items()}
             )
 
@@ -178,25 +196,20 @@ class RelationshipAnalyzer:
                 category="Error",
                 confidence=0.0,
                 evidence=f"Analysis failed: {str(e)}",
-                context_chunk=context_text,
+                context_chunk=str(context_text),
                 all_scores={}
             )
 
-    def _extract_best_evidence(self, context_text: str, winning_profile_embedding) -> str:
-        """Extract the sentence that best supports the classification"""
+    def _extract_best_evidence(self, context: IsolatedContext, winning_profile_embedding) -> str:
+        """Extract the sentence that best supports the classification (reusing the context's sentence embeddings)"""
+        context_text = str(context)
         try:
-            context_sentences = [sent.text.strip() for sent in self.nlp(context_text).sents]
-            if not context_sentences:
-                return context_text[:200] + "..." if len(context_text) > 200 else context_text
-
-            sentence_embeddings = self.semantic_model.encode(context_sentences)
-            evidence_similarities = util.cos_sim(winning_profile_embedding, sentence_embeddings)[0]
-            best_sentence_index = np.argmax(evidence_similarities)
-
-            return context_sentences[best_sentence_index]
+            evidence_sentence = context.evidence(self.semantic_model, winning_profile_embedding)
+            if evidence_sentence is not None:
+                return evidence_sentence
         except Exception as e:
             logger.warning(f"Error extracting evidence: {e}")
-            return context_text[:200] + "..." if len(context_text) > 200 else context_text
+        return context_text[:200] + "..." if len(context_text) > 200 else context_text
 
     def analyze_company_relationship(self, text_content: str, company_name: str,
                                      keyword: str, **kwargs) -> AnalysisResult:
@@ -215,9 +228,8 @@ class RelationshipAnalyzer:
         logger.info(f"Analyzing relationship between {company_name} and {keyword}")
 
         # Step 1: Isolate relevant context
+        # Aliases such as AWS -> Amazon Web Services come from the keyword registry
         additional_keywords = kwargs.get('additional_keywords', [])
-        if keyword.upper() == 'AWS':
-            additional_keywords.append('Amazon Web Services')
 
         isolated_chunk = self.isolate_context(
             text_content,
@@ -239,6 +251,90 @@ class RelationshipAnalyzer:
         # Step 2: Perform semantic analysis
         return self.analyze_relationship_semantically(isolated_chunk, company_name, keyword)
 
+    def analyze_many(self, rows: Iterable[Tuple[str, str, str]], batch_size: int = ANALYZE_BATCH_SIZE,
+                     **kwargs) -> List[AnalysisResult]:
+        """
+        Batch version of analyze_company_relationship for (text_content, company_name, keyword) rows.
+
+        Rows are taken `batch_size` at a time: spaCy segments them with nlp.pipe, every sentence of every
+        context in the batch goes through one encode call, and every context is scored against every
+        profile with one matrix multiply. Accepts the same keyword arguments as
+        analyze_company_relationship and returns one AnalysisResult per row, in order.
+        """
+        rows = iter(rows)
+        results = []
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return results
+            try:
+                results.extend(self._analyze_batch(batch, **kwargs))
+            except Exception as e:
+                logger.error(f"Batch analysis failed ({e}); analysing its {len(batch)} rows one by one")
+                results.extend(self.analyze_company_relationship(*row, **kwargs) for row in batch)
+            logger.info(f"Analysed {len(results)} rows")
+
+    def _analyze_batch(self, rows: List[Tuple[str, str, str]], sentences_before: int = 2,
+                       sentences_after: int = 2, additional_keywords: List[str] = None) -> List[AnalysisResult]:
+        texts = [str(text) if text else "" for text, _, _ in rows]
+        contexts = [
+            self._context_from_doc(doc, keyword, sentences_before, sentences_after, additional_keywords)
+            if text and keyword else None
+            for doc, text, (_, _, keyword) in zip(self.nlp.pipe(texts), texts, rows)
+        ]
+        results: List[Optional[AnalysisResult]] = [
+            None if context else AnalysisResult(
+                category="Not Found",
+                confidence=0.0,
+                evidence=f"Keyword '{keyword}' not found in text.",
+                context_chunk="",
+                all_scores={}
+            )
+            for context, (_, _, keyword) in zip(contexts, rows)
+        ]
+        found = [i for i, context in enumerate(contexts) if context]
+        if not found:
+            return results
+
+        # Profiles of every (company, keyword) pair in the batch, stacked into one matrix
+        blocks: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+        profile_rows = []
+        for i in found:
+            _, company_name, keyword = rows[i]
+            if (company_name, keyword) not in blocks:
+                categories, embeddings = profile_cache.get(
+                    self.semantic_model, PROFILE_TAXONOMY, self.get_relationship_profiles, company_name, keyword
+                )
+                blocks[(company_name, keyword)] = (len(profile_rows), categories)
+                profile_rows.extend(np.asarray(embeddings, dtype=np.float32))
+        profiles = _normalize(np.vstack(profile_rows))
+
+        # One encode call for every sentence of every context, one matrix multiply for all scores
+        found_contexts = [contexts[i] for i in found]
+        encode_contexts(self.semantic_model, found_contexts)
+        if CONTEXT_POOLING == "encode":
+            context_vectors = self.semantic_model.encode(
+                [str(context) for context in found_contexts], batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True
+            )
+        else:
+            context_vectors = np.vstack([context.vector(self.semantic_model) for context in found_contexts])
+        scores = _normalize(context_vectors) @ profiles.T
+
+        for row, i in enumerate(found):
+            _, company_name, keyword = rows[i]
+            offset, categories = blocks[(company_name, keyword)]
+            row_scores = scores[row, offset:offset + len(categories)]
+            top = int(np.argmax(row_scores))
+            results[i] = AnalysisResult(
+                category=categories[top],
+                confidence=round(float(row_scores[top]), 4),
+                # Evidence is scored on the sentence embeddings encoded above
+                evidence=self._extract_best_evidence(contexts[i], profiles[offset + top]),
+                context_chunk=str(contexts[i]),
+                all_scores={category: round(float(score), 4) for category, score in zip(categories, row_scores)}
+            )
+        return results
+
     def print_analysis_report(self, result: AnalysisResult, include_context: bool = True):
         """Print a formatted analysis report"""
         print("=" * 60)
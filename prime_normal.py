@@ -1,9 +1,7 @@
 import httpx
 import html2text
-from bs4 import BeautifulSoup
 from markdownify import markdownify as md
 import re
-import spacy
 try:
     from langchain_community.document_transformers import Html2TextTransformer
     LANGCHAIN_AVAILABLE = True
@@ -11,6 +9,10 @@ except ImportError:
     LANGCHAIN_AVAILABLE = False
 from datetime import datetime
 from dateutil.parser import parse
+from extract.rate_limit import limiter
+from extract.document import Document
+from extract.keywords import keyword_pattern
+from extract.nlp import sentence_pipeline
 
 """ Possible outcomes of this file
 1. 5 distinct, clean chunks of text
@@ -21,6 +23,7 @@ from dateutil.parser import parse
 # Html
 def html_extract(url):
     raw_text = ""
+    limiter.acquire(url)
 
     try:
         headers = {
@@ -74,28 +77,23 @@ def html_extract(url):
     return raw_text
 
 # Html Clean
-def html_clean(raw_html):
+def html_clean(raw_html, keyword=None):
+    """
+    Text of the page's main content, one block per line. Accepts raw HTML or a parsed Document.
+    With a keyword, falls back to the whole page when the main content does not mention it.
+    """
     if not raw_html:
         return "Input HTML is empty."
 
     try:
-        soup = BeautifulSoup(raw_html, 'html.parser')
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Get text, preserving line breaks
-        text = soup.get_text(separator='\n')
-        
-        # Clean up whitespace and remove blank lines
-        lines = (line.strip() for line in text.splitlines())
-        cleaned_text = "\n".join(line for line in lines if line)
-
-        return cleaned_text
+        document = Document.of(raw_html)
+        # Boilerplate (navigation, banners, footers, link lists) removed; blocks are already whitespace-collapsed
+        return document.content_text(keyword, separator='\n')
     except Exception as e:
-        print(f"BeautifulSoup cleaning failed: {e}")
-        # Fallback to markdownify if BeautifulSoup fails
+        print(f"HTML cleaning failed: {e}")
+        # Fallback to markdownify if parsing fails
         try:
-            md_text = md(raw_html)
+            md_text = md(raw_html if isinstance(raw_html, str) else raw_html.html)
             print("Cleaned HTML using markdownify")
             return md_text
         except Exception as e_md:
@@ -110,9 +108,10 @@ def extract_content(clean_cont, keyword, limit=5, **kwargs):
     """
     lines_with_keyword = []
     lines = clean_cont.split('\n')
+    pattern = keyword_pattern(keyword)
 
     for line in lines:
-        if re.search(keyword, line, re.IGNORECASE):
+        if pattern.search(line):
             lines_with_keyword.append(line.strip())
         if len(lines_with_keyword) >= limit:
             break
@@ -124,16 +123,17 @@ def extract_content(clean_cont, keyword, limit=5, **kwargs):
 
 def extract_content_with_spacy(web_page_content: str, keyword: str) -> list[str]:
 
-    nlp = spacy.load("en_core_web_sm")
+    nlp = sentence_pipeline()  # loaded once per process, sentence segmentation only
     print(f"Searching for keyword '{keyword}' using spaCy...")
 
     doc = nlp(web_page_content)
 
     context_sentences = []
+    pattern = keyword_pattern(keyword)
     # Iterate through each sentence in the document
     for sent in doc.sents:
-        # Check for the keyword (case-insensitive)
-        if keyword.lower() in sent.text.lower():
+        # Check for the keyword or one of its aliases (case-insensitive, whole words)
+        if pattern.search(sent.text):
             context_sentences.append(sent.text.strip())
 
     if not context_sentences:
@@ -142,8 +142,8 @@ def extract_content_with_spacy(web_page_content: str, keyword: str) -> list[str]
     return context_sentences[0:20]
 
 # Date
-def find_date(raw_html: str) -> str | None:
-  
+def find_date(raw_html: str | Document) -> str | None:
+    """Best MM/YYYY date for a page, from raw HTML or a parsed Document."""
     def _parse_and_format_date(date_str: str) -> str | None:
         """Tries to parse a date string and returns it in MM/YYYY format."""
         if not date_str:
@@ -157,44 +157,43 @@ def find_date(raw_html: str) -> str | None:
     if not raw_html:
         return None
 
-    soup = BeautifulSoup(raw_html, 'html.parser')
-
-    main_content_selectors = ['article', 'main', '.post-body', '.entry-content', '.td-post-content']
-    main_content = None
-    for selector in main_content_selectors:
-        main_content = soup.select_one(selector)
-        if main_content:
-            break
+    document = Document.of(raw_html)
 
+    main_content = document.main_content(separator='')
     if main_content:
         body_date_pattern = r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s\d{1,2},?\s\d{4}|\b\d{1,2}\s(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s\d{4}'
-        match = re.search(body_date_pattern, main_content.get_text(), re.IGNORECASE)
+        match = re.search(body_date_pattern, main_content, re.IGNORECASE)
         if match:
             date = _parse_and_format_date(match.group(0))
             if date: return date
 
-
-    patterns_metadata = [
-        # 2. Common meta tags
-        r'<meta[^>]+(?:property|name)="(?:article:published_time|published_date|date)"[^>]+content="([^"]+)"',
-        r'<meta[^>]+(?:property|name)="(?:article:modified_time|modified_date)"[^>]+content="([^"]+)"',
-        # 3. JSON-LD structured data
-        r'"datePublished"\s*:\s*"([^"]+)"',
-        r'"dateModified"\s*:\s*"([^"]+)"',
-        # 4. The <time> HTML tag
-        r'<time[^>]*datetime="([^"]+)"',
-        # 5. Visible text with keywords (searching the raw HTML)
-        r'(?:published|released|modified|updated|posted)[\s:onby-]*([\w\s,./-]+\d{4})'
+    # 2. Common meta tags (parsed once, no regex over the raw HTML)
+    meta = {key.lower(): value for key, value in document.meta.items()}
+    candidates = [
+        meta.get('article:published_time'), meta.get('published_date'), meta.get('date'),
+        meta.get('article:modified_time'), meta.get('modified_date'),
     ]
+    # 3. JSON-LD structured data
+    for key in ('datePublished', 'dateModified'):
+        for block in document.json_ld:
+            match = re.search(rf'"{key}"\s*:\s*"([^"]+)"', block)
+            if match:
+                candidates.append(match.group(1))
+                break
+    # 4. The <time> HTML tag
+    candidates.extend(document.attrs('time[datetime]', 'datetime')[:1])
+    for candidate in candidates:
+        date = _parse_and_format_date(candidate)
+        if date: return date
 
-    for pattern in patterns_metadata:
-        match = re.search(pattern, raw_html, re.IGNORECASE)
-        if match:
-            date = _parse_and_format_date(match.group(1))
-            if date: return date
+    # 5. Visible text with keywords
+    visible_text = document.text(separator=' ')
+    match = re.search(r'(?:published|released|modified|updated|posted)[\s:onby-]*([\w\s,./-]+\d{4})', visible_text, re.IGNORECASE)
+    if match:
+        date = _parse_and_format_date(match.group(1))
+        if date: return date
 
     # 6: Any date visible on the page (keyword-less) ---
-    visible_text = soup.get_text(separator=' ')
     any_date_pattern = r'\b(?:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s\d{1,2},?\s\d{4}|\d{1,2}\s(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s\d{4}|\d{1,2}[./-]\d{1,2}[./-]\d{4})\b'
     match = re.search(any_date_pattern, visible_text, re.IGNORECASE)
     if match:
@@ -202,7 +201,7 @@ def find_date(raw_html: str) -> str | None:
         if date: return date
 
     # 7: Copyright year as a last resort ---
-    cc_match = re.search(r'(?:©|cc|copyright|(c)|&copy;)\s*(\d{4})', raw_html, re.IGNORECASE)
+    cc_match = re.search(r'(?:©|cc|copyright|(c)|&copy;)\s*(\d{4})', document.html, re.IGNORECASE)
     if cc_match:
         try:
             year = int(cc_match.group(1))
@@ -221,20 +220,20 @@ def find_date(raw_html: str) -> str | None:
     return None
 
 # Social Media
-def social_links(raw_html: str) -> dict:
+def social_links(raw_html: str | Document) -> dict:
     """
     Parses raw HTML to find and extract social media PROFILE links,
     prioritizing links found in the footer.
 
     Args:
-        raw_html: A string containing the raw HTML content of a webpage.
+        raw_html: The raw HTML content of a webpage, or its already parsed Document.
 
     Returns:
         A dictionary where keys are the names of the social media platforms
         and values are their corresponding direct profile URLs.
     """
     social_links = {}
-    soup = BeautifulSoup(raw_html, 'html.parser')
+    document = Document.of(raw_html)
 
     # Keywords that indicate a "sharing" link, which we want to ignore.
     ignore_patterns = ['sharer.php', 'shareArticle', '/share?', 'intent/tweet']
@@ -249,12 +248,7 @@ def social_links(raw_html: str) -> dict:
         'instagram.com': 'instagram'
     }
 
-    all_links = soup.find_all('a')
-
-    for link in reversed(all_links):
-        url = link.get('href')
-        if not url:
-            continue
+    for url in reversed(document.anchors):
 
         if any(pattern in url for pattern in ignore_patterns):
             continue
@@ -269,17 +263,18 @@ def social_links(raw_html: str) -> dict:
 # primary function
 def normal(url,keyword):
     raw_text = html_extract(url)
-    clean_content = html_clean(raw_text)
+    document = Document(raw_text)  # parsed once, shared by the three extractors
+    clean_content = html_clean(document, keyword)
     context = extract_content(clean_content, keyword)
     # context = extract_content_with_spacy(clean_content, keyword)
-    date = find_date(raw_text)
-    social = social_links(raw_text)
+    date = find_date(document)
+    social = social_links(document)
     return context, date, social
 
 
 def html(url,keyword):
     raw_text = html_extract(url)
-    clean_content = html_clean(raw_text)
+    clean_content = html_clean(raw_text, keyword)
     context = extract_content(clean_content, keyword)
     # context = extract_content_with_spacy(clean_content, keyword)
     return context
@@ -1,7 +1,12 @@
-import spacy
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 import numpy as np
 from extract.normal_3 import *
+from extract.matcher import sentence_hits
+from extract.keywords import keyword_matcher
+from extract.nlp import sentence_pipeline
+from extract.embeddings import load_model
+from extract.profile_cache import profile_cache
+from extract.sentences import as_context, sentence_window
 import re
 
 # This is a comprehensive list of keywords to identify relevant sentences for context extraction.
@@ -45,8 +50,9 @@ KEYWORD_TARGETS = [
     "enhanced", "augmented", "modernized", "transformed", "digitalized"
 ]
 
-nlp = spacy.load("en_core_web_sm")
-semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+nlp = sentence_pipeline()  # only doc.sents is used: no tagger/parser/NER
+semantic_model = load_model()  # all-MiniLM-L6-v2 on the configured backend (see extract.embeddings)
+PROFILE_TAXONOMY = "temo_extract/relationship-v1"  # bump whenever a profile text changes
 
 
 def isolate_context(text, keyword, sentences_before=2, sentences_after=2):
@@ -55,35 +61,17 @@ def isolate_context(text, keyword, sentences_before=2, sentences_after=2):
     """
     doc = nlp(str(text))
     sentences = list(doc.sents)
-    relevant_indices = set()
 
-    # Create a lowercase set for faster lookup
-    keyword_targets_lower = {target.lower() for target in KEYWORD_TARGETS}
+    # One automaton for the primary keyword, its aliases and all secondary targets, run once over the whole text
+    matcher = keyword_matcher(keyword, *KEYWORD_TARGETS)
+    hits = sentence_hits(matcher, doc.text, [sentence.start_char for sentence in sentences])
+    # The context keeps its sentences, so the analysis never segments or encodes them a second time.
+    return sentence_window(sentences, hits, sentences_before, sentences_after)
 
-    for i, sentence in enumerate(sentences):
-        sentence_lower = sentence.text.lower()
-        # Check if the primary keyword or any of the secondary keywords are in the sentence
-        if keyword.lower() in sentence_lower or any(target in sentence_lower for target in keyword_targets_lower):
-            start_index = max(0, i - sentences_before)
-            end_index = min(len(sentences), i + sentences_after + 1)
-            relevant_indices.update(range(start_index, end_index))
 
-    if not relevant_indices:
-        return None
-
-    sorted_indices = sorted(list(relevant_indices))
-    context_text = " ".join([sentences[i].text.strip() for i in sorted_indices])
-    return context_text
-
-
-def analyze_relationship_semantically(context_text, company_name, keyword):
-    """
-    Analyzes the context chunk to classify the relationship using semantic similarity.
-    """
-    if not context_text:
-        return {"category": "Uncertain", "confidence": 0.0, "evidence": "Keyword not found in text."}
-
-    relationship_profiles = {
+def build_relationship_profiles(company_name, keyword):
+    """The relationship profiles for one company and keyword (PROFILE_TAXONOMY)."""
+    return {
         "Service Provider/Partner": (
             f"{company_name} offers professional services, solutions, consulting, and expertise for {keyword}. "
             f"They help their clients migrate to, build on, or manage the {keyword} platform. "
@@ -121,6 +109,15 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
         )
     }
 
+
+def analyze_relationship_semantically(context_text, company_name, keyword):
+    """
+    Analyzes the context chunk to classify the relationship using semantic similarity.
+    """
+    if not context_text:
+        return {"category": "Uncertain", "confidence": 0.0, "evidence": "Keyword not found in text."}
+    context = as_context(nlp, context_text)  # sentences and their embeddings are shared by every step below
+
     # This dictionary maps the category names to the final, human-readable phrase.
     output_phrases = {
         "Service Provider/Partner": "is a Service Provider or Partner for",
@@ -135,9 +132,10 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
         "Uncertain": "has an uncertain relationship with"
     }
 
-    # --- Step 2: Encode Profiles and Context ---
-    profile_embeddings = semantic_model.encode(list(relationship_profiles.values()))
-    context_embedding = semantic_model.encode(context_text)
+    # --- Step 2: Encode Profiles and Context (profiles come from the shared embedding cache) ---
+    categories, profile_embeddings = profile_cache.get(semantic_model, PROFILE_TAXONOMY, build_relationship_profiles,
+                                                       company_name, keyword)
+    context_embedding = context.vector(semantic_model)
 
     # --- Step 3: Calculate Similarity Scores ---
     similarities = util.cos_sim(context_embedding, profile_embeddings)[0]  # Get a 1D tensor of scores
@@ -145,17 +143,11 @@ def analyze_relationship_semantically(context_text, company_name, keyword):
     # --- Step 4: Classify and Get Confidence ---
     top_score_index = np.argmax(similarities)
     confidence_score = float(similarities[top_score_index])
-    winner_category = list(relationship_profiles.keys())[top_score_index]
+    winner_category = categories[top_score_index]
 
     # --- Step 5: Extract Best Sentence as Evidence ---
     # Find the single sentence in the context that is most similar to the winning profile.
-    context_sentences = [sent.text.strip() for sent in nlp(context_text).sents]
-    sentence_embeddings = semantic_model.encode(context_sentences)
-    winning_profile_embedding = profile_embeddings[top_score_index]
-
-    evidence_similarities = util.cos_sim(winning_profile_embedding, sentence_embeddings)[0]
-    best_sentence_index = np.argmax(evidence_similarities)
-    evidence_sentence = context_sentences[best_sentence_index]
+    evidence_sentence = context.evidence(semantic_model, profile_embeddings[top_score_index]) or str(context)
 
     # Extract a smaller, more focused snippet from the best sentence
     # This directly addresses the "smaller and accurate" request.
@@ -1,13 +1,14 @@
 import requests
-from bs4 import BeautifulSoup
 import csv
 import json
-import time
 from urllib.parse import urljoin, urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import re
 from collections import defaultdict
 import logging
+from extract.rate_limit import limiter
+from extract.document import Document
+from extract.matcher import get_matcher
+from extract.keywords import TECHNOLOGY_ALIASES
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -30,6 +31,7 @@ class TechnologyScanner:
         for category, keywords in self.keywords_dict.items():
             for keyword in keywords:
                 self.all_keywords.append((category, keyword.lower()))
+        self.matcher = get_matcher(keyword for _, keyword in self.all_keywords)
 
     def get_page_content(self, url, timeout=10):
         """Get page content with error handling"""
@@ -37,6 +39,7 @@ class TechnologyScanner:
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
 
+            limiter.acquire(url)  # Shared per-domain politeness limit
             response = self.session.get(url, timeout=timeout, allow_redirects=True)
             response.raise_for_status()
             return response.text.lower()
@@ -47,11 +50,9 @@ class TechnologyScanner:
     def extract_internal_links(self, url, html_content, base_domain):
         """Extract internal links from HTML content"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
             links = set()
 
-            for link in soup.find_all('a', href=True):
-                href = link['href']
+            for href in Document(html_content).anchors:
                 full_url = urljoin(url, href)
 
                 # Only include links from the same domain
@@ -72,11 +73,10 @@ class TechnologyScanner:
     def scan_page_for_keywords(self, url, content):
         """Scan page content for keywords"""
         found_keywords = []
+        present = self.matcher.found(content)  # one pass over the page for every keyword
 
         for category, keyword in self.all_keywords:
-            # Use word boundaries for better matching
-            pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-            if re.search(pattern, content):
+            if keyword in present:
                 found_keywords.append({
                     'category': category,
                     'keyword': keyword,
@@ -138,9 +138,6 @@ class TechnologyScanner:
                     except Exception as e:
                         logger.warning(f"Failed to process links for {url}: {str(e)}")
 
-            # Small delay to be respectful
-            time.sleep(0.5)
-
         logger.info(f"Completed {company_name}: Found {len(company_results)} keyword matches")
         return {
             'company': company_name,
@@ -194,23 +191,12 @@ class TechnologyScanner:
         logger.info(f"Results saved to {output_file}")
 
 
-# Your keywords dictionary
+# Your keywords dictionary: scan categories over the aliases in the shared keyword registry
 KEYWORDS_DICT = {
-    "SAP": [
-        "SAP", "S/4HANA", "SAP Business One", "SAP Business ByDesign",
-        "SAP ERP Central Component", "SAP Customer Experience", "SAP Sales Cloud",
-        "SAP Edge Services", "SAP HANA"
-    ],
-    "VMware": [
-        "VMware", "VMware vSphere", "vSphere", "vCenter", "VMWare ESX",
-        "VMware Horizon", "VMware vSAN", "VMware Infrastructure", "VMware vRealize"
-    ],
-    "Cloud": [
-        "AWS", "Azure", "Microsoft Azure", "GCP", "Google Cloud Platform",
-        "Microsoft Cloud", "Google Cloud", "Alibaba Cloud", "IBM Cloud",
-        "Ali Cloud", "Amazon Web Services", "Amazon EC2", "Amazon RDS", "Amazon S3",
-        "Amazon IAM", "Amazon EBS", "Amazon Lambda", "Amazon EFS", "Amazon CloudFront"
-    ]
+    "SAP": TECHNOLOGY_ALIASES["SAP"],
+    "VMware": TECHNOLOGY_ALIASES["VMware"],
+    "Cloud": [alias for technology in ("AWS", "Azure", "GCP", "Alibaba Cloud", "IBM Cloud")
+              for alias in TECHNOLOGY_ALIASES[technology]],
 }
 
 
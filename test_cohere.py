@@ -53,12 +53,16 @@ keyword = "sap"
 def get_pdf_date(pdf_url):
     import requests, fitz
     from io import BytesIO
+    from extract.pdf_range import read_pdf_info
 
-    response = requests.get(pdf_url)
-    response.raise_for_status()
+    # Byte-range read of the trailer and info dictionary; full download only as a fallback
+    meta = read_pdf_info(pdf_url)
+    if not meta:
+        response = requests.get(pdf_url)
+        response.raise_for_status()
 
-    doc = fitz.open(stream=BytesIO(response.content), filetype="pdf")
-    meta = doc.metadata
+        doc = fitz.open(stream=BytesIO(response.content), filetype="pdf")
+        meta = doc.metadata
 
     # Try creationDate or modDate
     date = meta.get("creationDate") or meta.get("modDate")
@@ -0,0 +1,100 @@
+"""
+Parity check for the int8-quantized ONNX embedding backend in extract/embeddings.py.
+Embeds sentences from the pages stored in the HTTP cache (and any .html files given; a built-in sample
+when there are none) with the torch and the onnx backend, scores every sentence against a set of
+relationship statements by cosine similarity the way the analyzers score contexts against their profiles,
+and checks that no score moves by more than the tolerance. A pass is recorded in ONNX_PARITY_RECORD,
+which is what lets EMBEDDING_BACKEND=onnx load that model variant.
+
+    python test_embedding_parity.py                        # cached pages, tolerance 0.05
+    python test_embedding_parity.py -t 0.03 saved/*.html   # stricter, plus local files
+"""
+import re
+import sys
+import argparse
+from typing import List
+
+import numpy as np
+
+from extract.document import Document
+from extract.embeddings import (EMBEDDING_MODEL, EMBEDDING_THREADS, ONNX_AVAILABLE, ONNX_PARITY_RECORD,
+                                load_model, record_parity)
+from test_parser_parity import load_pages
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+SAMPLE_SENTENCES = [
+    "As an official AWS partner, Nutanix offers solutions that are deeply integrated with Amazon Web Services.",
+    "Our joint customers run applications on Nutanix cloud infrastructure and connect to AWS for S3 and Glacier.",
+    "We are hiring engineers with AWS experience to build on this collaboration.",
+    "This is a big investment for Nutanix and a milestone in our cloud strategy.",
+    "Amazon Web Services (AWS) is a comprehensive, broadly adopted cloud platform.",
+    "Learn how to deploy a serverless application on AWS Lambda in five steps.",
+    "Our platform runs entirely on Microsoft Azure, using AKS for every customer-facing service.",
+    "Register now for our webinar on migrating SAP S/4HANA workloads to the cloud.",
+    "The team monitors, patches and maintains our VMware vSphere clusters around the clock.",
+    "Compare the total cost of ownership of Google Cloud and on-premise data centers.",
+    "Certified SAP consultants help clients implement SAP Business One in under twelve weeks.",
+    "Candidates should hold an AWS Solutions Architect certification or equivalent experience.",
+]
+
+
+def load_sentences(paths: List[str], limit: int = 2000, min_chars: int = 30, max_chars: int = 400) -> List[str]:
+    """Distinct sentences of the cached pages plus the given files, or SAMPLE_SENTENCES without pages."""
+    sentences = []
+    for _, html in load_pages(paths):
+        sentences.extend(sentence for sentence in SENTENCE_SPLIT.split(Document(html).clean_text())
+                         if min_chars <= len(sentence) <= max_chars)
+    return list(dict.fromkeys(sentences))[:limit] or SAMPLE_SENTENCES
+
+
+def unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="extra .html files to include")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.05, help="largest allowed score difference")
+    parser.add_argument("--limit", type=int, default=2000, help="sentences to compare at most")
+    args = parser.parse_args()
+
+    if not ONNX_AVAILABLE:
+        print("onnxruntime/optimum are not installed: pip install 'sentence-transformers[onnx]'")
+        return 1
+
+    sentences = load_sentences(args.files, args.limit)
+    profiles = SAMPLE_SENTENCES  # relationship statements like the analyzers' profile texts
+    scores, vectors, models = {}, {}, {}
+    for backend in ("torch", "onnx"):
+        models[backend] = model = load_model(EMBEDDING_MODEL, backend, EMBEDDING_THREADS, require_parity=False)
+        vectors[backend] = unit(model.encode(sentences, batch_size=64, convert_to_numpy=True))
+        scores[backend] = vectors[backend] @ unit(model.encode(profiles, convert_to_numpy=True)).T
+
+    embedding_cosine = np.einsum("ij,ij->i", vectors["torch"], vectors["onnx"])
+    difference = np.abs(scores["torch"] - scores["onnx"])
+    agreement = np.mean(scores["torch"].argmax(axis=1) == scores["onnx"].argmax(axis=1))
+    print(f"| {EMBEDDING_MODEL}: torch vs int8 onnx over {len(sentences)} sentences x {len(profiles)} profiles")
+    print(f"|   embedding cosine   min {embedding_cosine.min():.4f}  mean {embedding_cosine.mean():.4f}")
+    print(f"|   score difference   max {difference.max():.4f}  mean {difference.mean():.4f}  "
+          f"p99 {np.percentile(difference, 99):.4f}")
+    print(f"|   top match agreement {agreement:.1%}")
+    for i in np.argsort(difference.max(axis=1))[::-1][:3]:
+        print(f"|   worst: {difference[i].max():.4f} {sentences[i][:90]!r}")
+
+    passed = difference.max() <= args.tolerance
+    print(f"| {'PASS' if passed else 'FAIL'}: largest score difference {difference.max():.4f} "
+          f"{'<=' if passed else '>'} tolerance {args.tolerance}")
+    if passed:
+        record_parity(models["onnx"].embedding_key, {
+            "sentences": len(sentences), "tolerance": args.tolerance,
+            "max_score_difference": round(float(difference.max()), 4),
+            "min_embedding_cosine": round(float(embedding_cosine.min()), 4),
+            "top_match_agreement": round(float(agreement), 4),
+        })
+        print(f"| recorded in {ONNX_PARITY_RECORD}: EMBEDDING_BACKEND=onnx will now use {models['onnx'].embedding_key}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
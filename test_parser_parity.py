@@ -0,0 +1,152 @@
+"""
+Parity check for the HTML parser backends in extract/document.py.
+Runs every backend over the pages stored in the HTTP cache (and any .html files given on the
+command line) and compares each result with what the old BeautifulSoup(html, "lxml") code produced.
+
+    python test_parser_parity.py                 # cached pages
+    python test_parser_parity.py saved/*.html    # plus local files
+"""
+import re
+import sys
+import warnings
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+from extract.document import Document, BACKENDS, PARSER_BACKEND, NON_CONTENT_TAGS, MAIN_CONTENT_SELECTORS
+from extract.http_cache import HttpCache
+from extract.page import DATE_HINT_SELECTORS
+from extract.normal_new import NOISE_SELECTORS
+
+warnings.filterwarnings("ignore")  # bs4 complains about XHTML served as HTML
+
+BLOCK_SELECTOR = "p, div, li, section"
+# Checked on every run, whatever is in the cache: cases where the parsers' whitespace rules differ
+FIXTURES = [
+    ("fixture: pre/textarea newlines", """<html><head><title>t</title></head><body>
+<nav>menu</nav>
+<article><h1>Install</h1>
+<pre>
+pip install x
+  --upgrade
+</pre>
+<pre class="code" data-x='a>b'>
+
+two leading newlines</pre>
+<pre>no leading newline</pre>
+<p>Fill in: <textarea name="t">
+first line
+second line</textarea></p>
+<div><pre><code>
+nested in code</code></pre></div>
+</article></body></html>"""),
+    ("fixture: date hints with and without datetime", """<html><head><title>t</title></head><body>
+<header><span class="post-date">Updated May 2, 2021</span></header>
+<article><time datetime="2022-04-05T10:00:00Z"></time>
+<time datetime="2023-01-09">January 9, 2023</time>
+<div id="publish-info">Published <b>7 June 2020</b></div>
+<span class="timestamp" datetime="2020-06-07">yesterday</span></article></body></html>"""),
+]
+
+
+def load_pages(paths: List[str]) -> List[Tuple[str, str]]:
+    """(name, html) for every cached HTML page plus the given files."""
+    pages = [(page.url, page.html) for page in HttpCache().pages() if page.html and not page.is_pdf]
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def legacy_extract(html: str) -> Dict[str, object]:
+    """The same values computed the way the extractors did before Document existed."""
+    def soup(drop=()):
+        parsed = BeautifulSoup(html, "lxml")
+        for selector in drop:
+            for tag in parsed.select(selector):
+                tag.decompose()
+        return parsed
+
+    full = soup()
+    main_content = None
+    for selector in MAIN_CONTENT_SELECTORS:
+        if tag := full.select_one(selector):
+            main_content = tag.get_text()
+            break
+    cleaned = soup(NOISE_SELECTORS)
+    content_area = cleaned.select_one("main, article")
+    meta = {}
+    for tag in full.find_all("meta"):
+        key = tag.get("name") or tag.get("property") or tag.get("itemprop")
+        if key and tag.get("content") is not None and key not in meta:
+            meta[key] = tag.get("content")
+
+    results = {
+        "clean_text": re.sub(r"\s+", " ", soup(NON_CONTENT_TAGS).get_text(separator=" ")).strip(),
+        "text_strip": full.get_text(separator=" ", strip=True),
+        "lines": [line.strip() for line in full.get_text(separator="\n").splitlines() if line.strip()],
+        "main_content": main_content,
+        "meta": meta,
+        "json_ld": [(s.string or "").strip() for s in full.find_all("script")
+                    if (s.get("type") or "").strip().lower() == "application/ld+json"],
+        "anchors": [a["href"] for a in full.find_all("a", href=True) if a["href"]],
+        "time_datetime": [tag.get("datetime") for tag in full.select("time[datetime]")],
+        "semantic_blocks": [block.get_text(separator=" ", strip=True)
+                            for block in content_area.find_all(["p", "div", "li", "section"])] if content_area else [],
+    }
+    for selector in DATE_HINT_SELECTORS:
+        results[f"hints {selector}"] = [(tag.get_text(), tag.get("datetime")) for tag in full.select(selector)]
+    return results
+
+
+def document_extract(html: str, backend: str) -> Dict[str, object]:
+    """The same values through Document with the given backend."""
+    document = Document(html, backend=backend)
+    results = {
+        "clean_text": document.clean_text(),
+        "text_strip": document.text(separator=" ", strip=True),
+        "lines": [line.strip() for line in document.text(separator="\n").splitlines() if line.strip()],
+        "main_content": document.main_content(separator=""),
+        "meta": document.meta,
+        "json_ld": [block.strip() for block in document.json_ld],
+        "anchors": document.anchors,
+        "time_datetime": document.attrs("time[datetime]", "datetime"),
+        "semantic_blocks": document.texts(BLOCK_SELECTOR, separator=" ", strip=True,
+                                          drop=NOISE_SELECTORS, within="main, article"),
+    }
+    if document.text(selector="main, article", drop=NOISE_SELECTORS) is None:
+        results["semantic_blocks"] = []
+    for selector in DATE_HINT_SELECTORS:
+        results[f"hints {selector}"] = document.items(selector, "datetime")
+    return results
+
+
+def main():
+    pages = load_pages(sys.argv[1:])
+    if not pages:
+        print("No stored pages found. Run a batch first (it fills the HTTP cache) or pass .html files.")
+    pages += FIXTURES
+
+    identical = Counter()
+    mismatched_fields = {backend: Counter() for backend in BACKENDS}
+    for name, html in pages:
+        expected = legacy_extract(html)
+        for backend in BACKENDS:
+            actual = document_extract(html, backend)
+            diffs = [key for key, value in expected.items() if actual[key] != value]
+            if diffs:
+                mismatched_fields[backend].update(diffs)
+                if backend == PARSER_BACKEND:
+                    print(f"| DIFF [{backend}] {name}: {', '.join(diffs)}")
+            else:
+                identical[backend] += 1
+
+    print(f"| Parity with the old BeautifulSoup(lxml) extractors over {len(pages)} pages:")
+    for backend in BACKENDS:
+        worst = ", ".join(f"{key} ({count})" for key, count in mismatched_fields[backend].most_common(3))
+        print(f"|   {backend:<11} {identical[backend]}/{len(pages)} identical" + (f" | differs in: {worst}" if worst else ""))
+    return 0 if identical[PARSER_BACKEND] == len(pages) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())